@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from n_puzzle import NPuzzle, MODES
+from budget import BudgetExceeded
+from heuristics import HEURISTICS
+from distance_table import load_table
+from solution_cache import SolutionCache
+from utils import check_puzzle_size, generate_goal_state, encode_state, iter_puzzles
+
+# Solution cache opened by each worker process, if requested
+_cache = None
+
+def _init_worker(heuristic, sizes, cache_path=None):
+    """
+    Build the shared heuristic tables once when a worker process starts.
+
+    Heuristic tables are cached per process, so each worker builds (or memory-maps) the tables of
+    a board size the first time it sees it and reuses them for every later puzzle of that size.
+    Sizes known in advance are warmed up here so the first puzzles do not pay for it.
+
+    Parameters:
+        heuristic (str): The heuristic code.
+        sizes (iterable of int): Board sizes to prepare tables for.
+        cache_path (str, optional): Solution cache database opened by the worker; "" for the default path.
+    """
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    # Reset on every call: with workers=1 the "worker" is the calling process, reused across batches
+    _cache = None if cache_path is None else SolutionCache(cache_path or None)
+    _, function = HEURISTICS.get(heuristic, HEURISTICS["m"])
+    for n in sizes:
+        function(n, encode_state(generate_goal_state(n)))
+
+def _solve_one(index, state, heuristic, mode, options):
+    """
+    Solve a single puzzle and describe the outcome.
+
+    Parameters:
+        index (int): The position of the puzzle in the input.
+        state (list of lists of int): The puzzle configuration.
+        heuristic (str): The heuristic code.
+        mode (str): The search mode.
+        options (dict): Extra keyword arguments for NPuzzle.solve.
+
+    Returns:
+        dict: index, cost, nodes_expanded and time (seconds), plus path and stats (as a dict) when 
+              options request them and suboptimality for bounded-suboptimal solutions, or index and 
+              error for invalid puzzles (including sizes outside 3x3..6x6), exhausted budgets and modes whose optional dependency is 
+              missing.
+    """
+    start = time.perf_counter()
+    try:
+        check_puzzle_size(state)
+        puzzle = NPuzzle(state, heuristic=heuristic, mode=mode)
+        cost = puzzle.solve(cache=_cache, **options)
+    except (ValueError, BudgetExceeded, ImportError) as error:
+        # ImportError: a mode whose optional dependency is missing (e.g. "vectorized" without NumPy)
+        return {"index": index, "error": str(error)}
+    path = stats = None
+    if options.get("stats"):
+        *cost, stats = cost
+        cost = cost if options.get("return_path") else cost[0]
+    if options.get("return_path"):
+        cost, path = cost
+    result = {
+        "index": index,
+        "cost": cost,
+        "nodes_expanded": puzzle.nodes_expanded,
+        "time": time.perf_counter() - start,
+    }
+    if puzzle.suboptimality > 1:
+        result["suboptimality"] = puzzle.suboptimality
+    if options.get("return_path"):
+        result["path"] = path
+    if stats is not None:
+        result["stats"] = stats.to_dict()
+    return result
+
+def solve_many(states, heuristic="m", mode="astar", workers=None, sizes=(), cache=None, **options):
+    """
+    Solve many puzzles, yielding each result as soon as it is available.
+
+    The puzzles are consumed lazily from the iterable and fanned out across a process pool; at most
+    a few puzzles per worker are in flight, so memory stays bounded for arbitrarily long inputs.
+    Results arrive in completion order and carry the index of their puzzle in the input.
+
+    Parameters:
+        states (iterable of list of lists of int): The puzzle configurations.
+        heuristic (str, optional): The heuristic code (see heuristics.HEURISTICS), "m" by default.
+        mode (str, optional): The search mode (see n_puzzle.MODES), "astar" by default.
+        workers (int, optional): Number of worker processes; os.cpu_count() by default. A value of 1
+                                 solves every puzzle in the calling process.
+        sizes (iterable of int, optional): Board sizes whose heuristic tables each worker builds at startup.
+        cache (str, optional): Path of a SolutionCache database shared by the workers; "" selects the 
+                               default path and None (default) disables caching.
+        **options: Extra keyword arguments passed to NPuzzle.solve.
+
+    Yields:
+        dict: The result of each puzzle, as returned by _solve_one.
+
+    Raises:
+        ValueError: If the input cannot be parsed (see utils.iter_puzzles). The puzzles read before
+                    the bad input are still solved and yielded first.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(heuristic, sizes, cache)
+        for index, state in enumerate(states):
+            yield _solve_one(index, state, heuristic, mode, options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(heuristic, tuple(sizes), cache)) as executor:
+        pending = set()
+        error = None
+        try:
+            for index, state in enumerate(states):
+                pending.add(executor.submit(_solve_one, index, state, heuristic, mode, options))
+                # Bound the number of puzzles in flight before reading more input
+                if len(pending) >= 4 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+        except ValueError as parse_error:
+            # Raised while reading the input: finish the puzzles already in flight first
+            error = parse_error
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+        if error is not None:
+            raise error
+
+def main(argv=None):
+    """
+    Command-line entry point: solve every puzzle of a file or stdin and stream the results.
+
+    Each result is written as a JSON line as soon as its puzzle is solved. Invalid puzzles get an
+    error record and the batch goes on; input that cannot be parsed stops the batch with a message
+    on stderr.
+
+    Parameters:
+        argv (list of str, optional): The command-line arguments, sys.argv[1:] by default.
+
+    Returns:
+        int: The exit status: 0 on success, 1 if the input could not be read or parsed.
+    """
+    parser = argparse.ArgumentParser(description="Solve many sliding puzzles in parallel.")
+    parser.add_argument("file", nargs="?", default="-",
+                        help="puzzle file (multi-puzzle text or JSON lines); '-' or omitted reads stdin")
+    parser.add_argument("--heuristic", default="m", choices=sorted(HEURISTICS), help="heuristic code")
+    parser.add_argument("--mode", default="astar", choices=sorted(MODES), help="search mode")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--path", action="store_true", help="include the moves of each solution")
+    parser.add_argument("--stats", action="store_true", help="include the search statistics of each solution")
+    parser.add_argument("--cache", action="store_true",
+                        help="answer repeated boards from the default solution cache")
+    parser.add_argument("--cache-db", default=None, metavar="DB",
+                        help="use the solution cache database DB (implies --cache)")
+    parser.add_argument("--table", action="store_true",
+                        help="build the 3x3 distance table first if missing, so 3x3 boards are answered by lookup")
+    parser.add_argument("--sizes", type=int, nargs="*", default=(),
+                        help="board sizes whose heuristic tables are built when a worker starts")
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds allowed per puzzle")
+    parser.add_argument("--max-expansions", type=int, default=None, help="node expansions allowed per puzzle")
+    parser.add_argument("--max-open", type=int, default=None, help="open-list size allowed per puzzle")
+    parser.add_argument("--weight", type=float, default=None, help="heuristic weight of the weighted and anytime modes")
+    args = parser.parse_args(argv)
+
+    if args.weight is not None and args.mode not in ("weighted", "anytime"):
+        parser.error("--weight only applies to the weighted and anytime modes")
+
+    # "" selects the default database in the workers
+    cache = args.cache_db if args.cache_db is not None else ("" if args.cache else None)
+
+    if args.table:
+        # Built once here; the workers memory-map the file
+        load_table(build=True)
+
+    # Only forward the limits that were given, so every engine accepts the options
+    options = {name: value for name, value in (("time_limit", args.time_limit),
+                                                ("max_expansions", args.max_expansions),
+                                                ("max_open", args.max_open), ("weight", args.weight))
+               if value is not None}
+    try:
+        stream = sys.stdin if args.file == "-" else open(args.file)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    try:
+        for result in solve_many(iter_puzzles(stream), heuristic=args.heuristic, mode=args.mode,
+                                 workers=args.workers, sizes=args.sizes, return_path=args.path,
+                                 stats=args.stats, cache=cache, **options):
+            print(json.dumps(result), flush=True)
+    except ValueError as ve:
+        # Raised by the parser: the rest of the stream cannot be trusted
+        print(f"Error: {ve}", file=sys.stderr)
+        return 1
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
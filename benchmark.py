@@ -0,0 +1,364 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from budget import BudgetExceeded
+from n_puzzle import NPuzzle, MODES, build_transitions
+from heuristics import HEURISTICS
+from utils import generate_goal_state, encode_state, decode_state
+
+# Random-walk lengths generated per board size when none are given on the command line
+DEFAULT_DEPTHS = {3: (10, 20, 30), 4: (20, 30, 40), 5: (20, 30), 6: (20, 30)}
+
+# The Korf 100 instances shipped with the sources, with their known optimal costs
+KORF_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "korf100.txt")
+
+def random_walk_instance(n, depth, rng):
+    """
+    Generate a solvable puzzle by walking the blank randomly away from the goal.
+
+    The walk never immediately undoes its previous move, so the optimal cost of the result is at
+    most depth and, for short walks, usually close to it. Every board reached from the goal is
+    solvable by construction.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+        depth (int): The number of random moves.
+        rng (random.Random): The random number generator, seeded by the caller for reproducibility.
+
+    Returns:
+        list of lists of int: The puzzle configuration.
+    """
+    transitions = build_transitions(n)
+    state = bytearray(encode_state(generate_goal_state(n)))
+    blank = state.index(0)
+    previous = None
+    for _ in range(depth):
+        # The inverse of move i is move i ^ 1 (see utils.MOVES)
+        target, move = rng.choice([(target, move) for target, move in transitions[blank]
+                                   if previous is None or move != previous ^ 1])
+        state[blank], state[target] = state[target], 0
+        blank, previous = target, move
+    return [list(row) for row in decode_state(state, n)]
+
+def generate_instances(sizes=(3, 4, 5, 6), depths=None, count=5, seed=0):
+    """
+    Generate a reproducible benchmark set of random-walk instances.
+
+    Parameters:
+        sizes (iterable of int, optional): Board sizes, 3x3 through 6x6 by default.
+        depths (dict, optional): Maps a board size to the random-walk lengths generated for it;
+                                 DEFAULT_DEPTHS by default.
+        count (int, optional): Number of instances per size and depth.
+        seed (int, optional): Seed of the random number generator.
+
+    Returns:
+        list of dict: Instances with a unique "name", the board size "n", the walk "depth" and the
+                      puzzle "state".
+    """
+    depths = DEFAULT_DEPTHS if depths is None else depths
+    rng = random.Random(seed)
+    instances = []
+    for n in sizes:
+        for depth in depths.get(n, ()):
+            for i in range(count):
+                instances.append({
+                    "name": f"{n}x{n}-d{depth}-{i}",
+                    "n": n,
+                    "depth": depth,
+                    "state": random_walk_instance(n, depth, rng),
+                })
+    return instances
+
+def from_korf(tiles):
+    """
+    Convert a 15-puzzle from Korf's layout to the goal layout of this solver.
+
+    Korf's instances (Korf, 1985) use the goal with the blank in the top-left corner followed by
+    tiles 1..15, while this solver puts tiles 1..15 first and the blank last. Rotating the board by
+    180 degrees and relabeling tile t as 16 - t maps one goal onto the other and preserves the
+    optimal cost.
+
+    Parameters:
+        tiles (sequence of int): The 16 tiles in row-major order, 0 for the blank.
+
+    Returns:
+        list of lists of int: The equivalent puzzle for this solver.
+    """
+    converted = [16 - tile if tile else 0 for tile in reversed(tiles)]
+    return [converted[i:i + 4] for i in range(0, 16, 4)]
+
+def load_korf(file_path=KORF_PATH):
+    """
+    Read the Korf 100 15-puzzle instances from a file.
+
+    Each non-empty line holds 16 tiles in Korf's layout (see from_korf), optionally preceded by the
+    instance number and followed by further columns such as the known optimal cost, which is kept.
+    Lines starting with '#' are comments.
+
+    Parameters:
+        file_path (str, optional): The path to the instance file, the bundled benchmarks/korf100.txt
+                                   by default.
+
+    Returns:
+        list of dict: Instances as returned by generate_instances, named "korf-<number>", with the
+                      known "optimal" cost when the file provides it.
+
+    Raises:
+        ValueError: If a line does not hold 16 tiles.
+    """
+    instances = []
+    with open(file_path) as file:
+        for line in file:
+            if line.lstrip().startswith("#"):
+                continue
+            numbers = [int(token) for token in line.split()]
+            if not numbers:
+                continue
+            # 17 or more columns: the first one numbers the instance
+            number = numbers.pop(0) if len(numbers) > 16 else len(instances) + 1
+            if len(numbers) < 16 or sorted(numbers[:16]) != list(range(16)):
+                raise ValueError(f"Line {line.strip()!r} does not hold the 16 tiles of a 15-puzzle.")
+            instance = {"name": f"korf-{number}", "n": 4, "depth": None, "state": from_korf(numbers[:16])}
+            if len(numbers) > 16:
+                instance["optimal"] = numbers[16]
+            instances.append(instance)
+    return instances
+
+def run_instance(instance, mode, heuristic, repeat=1, memory=True, **options):
+    """
+    Solve one instance with one mode and heuristic and measure the search.
+
+    Heuristic tables are built before timing starts. The time is the best of repeat runs; peak
+    memory is measured by tracemalloc in a separate run, so its overhead does not inflate the time.
+
+    Parameters:
+        instance (dict): An instance as returned by generate_instances or load_korf.
+        mode (str): The search mode (see n_puzzle.MODES).
+        heuristic (str): The heuristic code (see heuristics.HEURISTICS).
+        repeat (int, optional): Number of timed runs.
+        memory (bool, optional): Also measure the peak memory allocated by the search.
+        **options: Extra keyword arguments for NPuzzle.solve.
+
+    Returns:
+        dict: instance, n, depth, mode, heuristic, cost, nodes_expanded, time (seconds),
+              nodes_per_second, peak_memory (bytes, None if not measured) and suboptimality; or the
+              same keys without measurements and an error message if the combination is not
+              supported or the budget ran out. The known optimal cost of the instance, if any, is
+              copied as optimal.
+    """
+    record = {"instance": instance["name"], "n": instance["n"], "depth": instance["depth"],
+              "mode": mode, "heuristic": heuristic}
+    if instance.get("optimal") is not None:
+        record["optimal"] = instance["optimal"]
+    # The distance table would answer 3x3 boards without searching
+    options.setdefault("use_table", False)
+    try:
+        puzzle = NPuzzle(instance["state"], heuristic=heuristic, mode=mode)
+        # Warm up the heuristic tables of this board size outside the measurements
+        puzzle.heuristic(puzzle.n, puzzle.goal)
+        best = None
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            cost = puzzle.solve(**options)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        peak = None
+        if memory:
+            tracemalloc.start()
+            try:
+                puzzle.solve(**options)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    except (ValueError, BudgetExceeded, ImportError) as error:
+        # ImportError: a mode whose optional dependency is missing (e.g. "vectorized" without NumPy)
+        record["error"] = str(error)
+        return record
+    record.update({
+        "cost": cost,
+        "nodes_expanded": puzzle.nodes_expanded,
+        "time": best,
+        "nodes_per_second": puzzle.nodes_expanded / best if best > 0 else 0.0,
+        "peak_memory": peak,
+        "suboptimality": puzzle.suboptimality,
+    })
+    return record
+
+def run_benchmark(instances, modes=None, heuristics=None, repeat=1, memory=True, progress=None, **options):
+    """
+    Run every combination of instance, search mode and heuristic.
+
+    Parameters:
+        instances (list of dict): Instances as returned by generate_instances or load_korf.
+        modes (iterable of str, optional): Search modes, every entry of n_puzzle.MODES by default.
+        heuristics (iterable of str, optional): Heuristic codes, every registered one by default.
+        repeat (int, optional): Number of timed runs per combination.
+        memory (bool, optional): Also measure peak memory.
+        progress (function, optional): Called with each record as soon as it is measured.
+        **options: Extra keyword arguments for NPuzzle.solve.
+
+    Returns:
+        list of dict: One record per combination, as returned by run_instance.
+    """
+    modes = list(MODES) if modes is None else list(modes)
+    heuristics = list(HEURISTICS) if heuristics is None else list(heuristics)
+    records = []
+    for instance in instances:
+        for mode in modes:
+            for heuristic in heuristics:
+                record = run_instance(instance, mode, heuristic, repeat=repeat, memory=memory, **options)
+                records.append(record)
+                if progress is not None:
+                    progress(record)
+    return records
+
+def compare(baseline, current, threshold=0.10, min_time=0.01):
+    """
+    Find regressions between two benchmark result files.
+
+    Records are matched by instance, mode and heuristic. A higher cost is a regression, and so is
+    any change of a cost that was proven optimal (suboptimality 1.0). Time, expanded nodes and peak
+    memory regress when they grow by more than threshold; times below min_time in both runs are
+    considered noise. Independently of the baseline, a current record that claims an optimal cost
+    different from the known optimum of its instance (such as the Korf 100 costs) is reported with
+    the metric "optimal".
+
+    Parameters:
+        baseline (dict): The reference results, as written by the run command.
+        current (dict): The results to check.
+        threshold (float, optional): Allowed relative growth, 10% by default.
+        min_time (float, optional): Seconds below which time differences are ignored.
+
+    Returns:
+        list of dict: One entry per regression with the instance, mode, heuristic, metric, both
+                      values and their ratio (None for costs and missing records).
+    """
+    def key(record):
+        return record["instance"], record["mode"], record["heuristic"]
+
+    current_records = {key(record): record for record in current["results"]}
+    regressions = []
+    for before in baseline["results"]:
+        if "error" in before:
+            continue
+        instance, mode, heuristic = key(before)
+        entry = {"instance": instance, "mode": mode, "heuristic": heuristic}
+        after = current_records.get(key(before))
+        if after is None or "error" in after:
+            regressions.append({**entry, "metric": "missing", "baseline": before.get("cost"),
+                                "current": after and after.get("error"), "ratio": None})
+            continue
+        if after["cost"] > before["cost"] or (after["cost"] != before["cost"]
+                                              and before.get("suboptimality", 1.0) == 1.0):
+            regressions.append({**entry, "metric": "cost", "baseline": before["cost"],
+                                "current": after["cost"], "ratio": None})
+        for metric in ("time", "nodes_expanded", "peak_memory"):
+            old, new = before.get(metric), after.get(metric)
+            if old is None or new is None:
+                continue
+            if metric == "time" and max(old, new) < min_time:
+                continue
+            if new > old * (1 + threshold):
+                regressions.append({**entry, "metric": metric, "baseline": old, "current": new,
+                                    "ratio": new / old if old else None})
+    for after in current["results"]:
+        if ("error" not in after and after.get("optimal") is not None
+                and after.get("suboptimality", 1.0) == 1.0 and after["cost"] != after["optimal"]):
+            instance, mode, heuristic = key(after)
+            regressions.append({"instance": instance, "mode": mode, "heuristic": heuristic,
+                                "metric": "optimal", "baseline": after["optimal"],
+                                "current": after["cost"], "ratio": None})
+    return regressions
+
+def main(argv=None):
+    """
+    Command-line entry point with two commands.
+
+    run: generate the instances, benchmark them and write the results as JSON.
+    compare: report the regressions of a result file against a baseline; the exit status is 1 if
+    there are any.
+
+    Parameters:
+        argv (list of str, optional): The command-line arguments, sys.argv[1:] by default.
+
+    Returns:
+        int: The exit status.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the sliding puzzle solvers.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmark and write the results as JSON")
+    run.add_argument("--sizes", type=int, nargs="*", default=[3, 4, 5, 6], help="board sizes to generate")
+    run.add_argument("--depths", type=int, nargs="*", default=None,
+                     help="random-walk lengths for every size (default: per-size depths)")
+    run.add_argument("--count", type=int, default=5, help="instances per size and depth")
+    run.add_argument("--seed", type=int, default=0, help="seed of the instance generator")
+    run.add_argument("--korf", action="store_true",
+                     help="also run the bundled Korf 100 instances (benchmarks/korf100.txt)")
+    run.add_argument("--korf-file", metavar="FILE", default=None,
+                     help="also run Korf-format instances read from FILE instead of the bundled set")
+    run.add_argument("--korf-count", type=int, default=None, help="only run the first N Korf instances")
+    run.add_argument("--modes", nargs="*", default=sorted(MODES), choices=sorted(MODES), help="search modes")
+    run.add_argument("--heuristics", nargs="*", default=list(HEURISTICS), choices=sorted(HEURISTICS),
+                     help="heuristic codes")
+    run.add_argument("--repeat", type=int, default=1, help="timed runs per combination (the best is kept)")
+    run.add_argument("--no-memory", action="store_true", help="skip the peak memory measurement")
+    run.add_argument("--output", "-o", default="benchmark.json", help="results file")
+
+    check = commands.add_parser("compare", help="flag regressions between two result files")
+    check.add_argument("baseline", help="reference results file")
+    check.add_argument("current", help="results file to check")
+    check.add_argument("--threshold", type=float, default=0.10, help="allowed relative growth (default 0.10)")
+    check.add_argument("--min-time", type=float, default=0.01, help="ignore time differences below this (seconds)")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        with open(args.current) as file:
+            current = json.load(file)
+        regressions = compare(baseline, current, threshold=args.threshold, min_time=args.min_time)
+        for regression in regressions:
+            ratio = f" ({regression['ratio']:.2f}x)" if regression["ratio"] else ""
+            print(f"REGRESSION {regression['instance']} {regression['mode']}/{regression['heuristic']} "
+                  f"{regression['metric']}: {regression['baseline']} -> {regression['current']}{ratio}")
+        print(f"{len(regressions)} regression(s) in {len(current['results'])} result(s).")
+        return 1 if regressions else 0
+
+    depths = None if args.depths is None else {n: tuple(args.depths) for n in args.sizes}
+    instances = generate_instances(args.sizes, depths, args.count, args.seed)
+    korf = args.korf_file or (KORF_PATH if args.korf else None)
+    if korf:
+        instances += load_korf(korf)[:args.korf_count]
+
+    def report(record):
+        outcome = record.get("error") or (f"cost {record['cost']}, {record['nodes_expanded']} nodes, "
+                                          f"{record['time']:.3f}s")
+        print(f"{record['instance']} {record['mode']}/{record['heuristic']}: {outcome}", file=sys.stderr)
+
+    results = run_benchmark(instances, args.modes, args.heuristics, repeat=args.repeat,
+                            memory=not args.no_memory, progress=report)
+    with open(args.output, "w") as file:
+        json.dump({
+            "meta": {
+                "seed": args.seed,
+                "sizes": args.sizes,
+                "count": args.count,
+                "korf": korf,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "results": results,
+        }, file, indent=1)
+    print("Results written to", args.output, file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
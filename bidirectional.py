@@ -0,0 +1,183 @@
+import heapq
+import math
+import time
+
+from budget import BudgetExceeded
+from heuristics import DELTA_TABLES, build_delta_table, euclidean, manhattan
+from utils import MOVES
+
+def target_distance_table(n, target, metric=manhattan):
+    """
+    Precompute the distance of every tile from every position to its position in an arbitrary target.
+
+    This generalizes manhattan_table and euclidean_table, which measure distances to the standard
+    goal, so that the backward search can estimate the distance to the initial state.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+        target (bytes): The flat encoding of the target state.
+        metric (function, optional): manhattan (default) or euclidean.
+
+    Returns:
+        list of lists: table[tile][pos] is the distance of tile at flat index pos from its position
+                       in target (0 for the blank).
+    """
+    table = [[0] * (n * n) for _ in range(n * n)]
+    for target_pos, tile in enumerate(target):
+        if tile == 0:
+            continue
+        target_i, target_j = divmod(target_pos, n)
+        for pos in range(n * n):
+            i, j = divmod(pos, n)
+            if metric is euclidean:
+                table[tile][pos] = math.sqrt((target_i - i)**2 + (target_j - j)**2)
+            else:
+                table[tile][pos] = abs(target_i - i) + abs(target_j - j)
+    return table
+
+def bidirectional_astar(puzzle, return_path=False, stats=None, progress=None, progress_every=10000, budget=None):
+    """
+    Solve a sliding puzzle with front-to-end bidirectional A*.
+
+    One A* search runs forward from the initial state towards the goal and another backward from
+    the goal towards the initial state; moves are reversible, so both use the same successor
+    generation. Each step expands the side with the smaller open list. Whenever a state has been
+    reached from both sides, the sum of its two path costs is a solution and the best one is kept
+    as an upper bound U. The search stops once U is no larger than the smallest f on either open
+    list, which proves that no cheaper path remains.
+
+    The forward search uses the puzzle's heuristic. The backward search needs distances to the
+    initial state instead of the standard goal: Manhattan and Euclidean are rebuilt for that target
+    (see target_distance_table), and other heuristics fall back to Manhattan for the backward side.
+
+    Parameters:
+        puzzle (NPuzzle): The puzzle to solve.
+        return_path (bool, optional): Also return the moves of the solution.
+        stats (SearchStats, optional): Statistics to fill in; open and closed sizes cover both sides.
+        progress (function, optional): Called with stats every progress_every expansions.
+        progress_every (int, optional): Number of expansions between progress calls.
+        budget (Budget, optional): Limits on the search; max_open bounds both open lists together.
+
+    Returns:
+        int: The optimal number of moves to reach the goal state, or -1 if the puzzle is unsolvable.
+             With return_path, a tuple (cost, path) as returned by NPuzzle.solve.
+
+    Raises:
+        BudgetExceeded: If the budget runs out before the solution is proven optimal.
+    """
+    n = puzzle.n
+    if puzzle.start == puzzle.goal:
+        puzzle.nodes_expanded = 0
+        return (0, []) if return_path else 0
+
+    # Forward heuristic: the puzzle's own, incremental when it has a delta table
+    delta_table = DELTA_TABLES.get(puzzle.heuristic)
+    forward_delta = delta_table(n) if delta_table is not None else None
+    forward_h = puzzle.heuristic(n, puzzle.start)
+    # Backward heuristic: distances to the initial state, always incremental
+    metric = euclidean if puzzle.heuristic is euclidean else manhattan
+    backward_distances = target_distance_table(n, puzzle.start, metric)
+    backward_delta = build_delta_table(n, backward_distances)
+    backward_h = sum(backward_distances[tile][pos] for pos, tile in enumerate(puzzle.goal))
+
+    # Per side: open list, best known g, parent moves (when the path is requested), delta table
+    sides = []
+    for root, h, delta, heuristic in ((puzzle.start, forward_h, forward_delta, puzzle.heuristic),
+                                      (puzzle.goal, backward_h, backward_delta, None)):
+        sides.append({
+            "root": root,
+            "open": [(h, 0, root, root.index(0), h)],
+            "g": {root: 0},
+            "parents": {} if return_path else None,
+            "delta": delta,
+            "heuristic": heuristic,
+        })
+    forward, backward = sides
+
+    best = math.inf  # Cost U of the best solution found so far
+    meeting = None  # State where the two searches met on the best solution
+    expanded = 0
+    clock = time.perf_counter
+
+    while forward["open"] and backward["open"]:
+        # Drop stale entries so the tops carry the true minimum f of each side
+        for side in sides:
+            frontier, best_g = side["open"], side["g"]
+            while frontier and frontier[0][1] > best_g[frontier[0][2]]:
+                heapq.heappop(frontier)
+                if stats is not None:
+                    stats.duplicates_skipped += 1
+        if not forward["open"] or not backward["open"]:
+            break
+        # No path through an unexpanded node can beat U once U <= the larger minimum f
+        if best <= max(forward["open"][0][0], backward["open"][0][0]):
+            break
+
+        if budget is not None:
+            reason = budget.exceeded(expanded, len(forward["open"]) + len(backward["open"]))
+            if reason is not None:
+                puzzle.nodes_expanded = expanded
+                if stats is not None:
+                    stats.peak_closed = len(forward["g"]) + len(backward["g"])
+                raise BudgetExceeded(reason, expanded)
+
+        # Expand the side with the smaller open list
+        side = forward if len(forward["open"]) <= len(backward["open"]) else backward
+        other = backward if side is forward else forward
+        _, cost, state, blank, h = heapq.heappop(side["open"])
+        expanded += 1
+        new_cost = cost + 1
+        best_g, other_g, parents, delta = side["g"], other["g"], side["parents"], side["delta"]
+
+        if stats is None:
+            children = puzzle.successors(state, blank)
+        else:
+            started = clock()
+            children = puzzle.successors(state, blank)
+            stats.successor_time += clock() - started
+            stats.nodes_generated += len(children)
+            open_size = len(forward["open"]) + len(backward["open"])
+            if open_size > stats.peak_open:
+                stats.peak_open = open_size
+            if progress is not None and expanded % progress_every == 0:
+                stats.nodes_expanded = expanded
+                stats.peak_closed = len(forward["g"]) + len(backward["g"])
+                progress(stats)
+
+        for child, child_blank, move in children:
+            if new_cost >= best_g.get(child, new_cost + 1):
+                if stats is not None:
+                    stats.duplicates_skipped += 1
+                continue
+            best_g[child] = new_cost
+            if parents is not None:
+                parents[child] = move
+            # A state reached from both sides closes a complete solution
+            if child in other_g and new_cost + other_g[child] < best:
+                best = new_cost + other_g[child]
+                meeting = child
+            if stats is not None:
+                started = clock()
+            if delta is not None:
+                child_h = h + delta[state[child_blank]][child_blank][move]
+            else:
+                child_h = side["heuristic"](n, child)
+            if stats is not None:
+                stats.heuristic_time += clock() - started
+            heapq.heappush(side["open"], (new_cost + child_h, new_cost, child, child_blank, child_h))
+
+    puzzle.nodes_expanded = expanded
+    if stats is not None:
+        stats.peak_closed = len(forward["g"]) + len(backward["g"])
+    if meeting is None:
+        return (-1, None) if return_path else -1
+    if not return_path:
+        return best
+
+    # Forward half from the initial state, then the backward half undone from the meeting state
+    path = puzzle.reconstruct_path(forward["parents"], meeting)
+    inverse = {label: next(other for di2, dj2, other in MOVES if (di2, dj2) == (-di, -dj))
+               for di, dj, label in MOVES}
+    backward_half = puzzle.reconstruct_path(backward["parents"], meeting, root=puzzle.goal)
+    path.extend(inverse[label] for label in reversed(backward_half))
+    return best, path
@@ -0,0 +1,64 @@
+import time
+
+class BudgetExceeded(Exception):
+    """
+    Raised when a search runs out of its budget before it has a solution to return.
+
+    Attributes:
+        reason (str): The exhausted limit: "time_limit", "max_expansions" or "max_open".
+        nodes_expanded (int): Nodes expanded before the search stopped.
+        stats (SearchStats or None): The statistics collected so far, when they were requested.
+    """
+
+    def __init__(self, reason, nodes_expanded=0):
+        super().__init__(f"Search budget exceeded ({reason}) after {nodes_expanded} expansions.")
+        self.reason = reason
+        self.nodes_expanded = nodes_expanded
+        self.stats = None
+
+class Budget:
+    """
+    Limits on the resources a single search may use.
+
+    Engines call exceeded once per expansion. Optimal engines raise BudgetExceeded when it reports
+    a limit; the anytime engine stops and returns its best solution instead.
+
+    Attributes:
+        time_limit (float or None): Wall-clock seconds allowed from the creation of the budget.
+        max_expansions (int or None): Maximum number of node expansions.
+        max_open (int or None): Maximum size of the open list (for depth-first engines, the stack).
+        deadline (float or None): The time.perf_counter() value at which the time limit expires.
+    """
+
+    def __init__(self, time_limit=None, max_expansions=None, max_open=None):
+        """
+        Start a budget; the time limit counts from now.
+
+        Parameters:
+            time_limit (float, optional): Wall-clock seconds allowed.
+            max_expansions (int, optional): Maximum number of node expansions.
+            max_open (int, optional): Maximum size of the open list.
+        """
+        self.time_limit = time_limit
+        self.max_expansions = max_expansions
+        self.max_open = max_open
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+    def exceeded(self, expanded, open_size):
+        """
+        Check the limits before another node is expanded.
+
+        Parameters:
+            expanded (int): Nodes expanded so far.
+            open_size (int): The current size of the open list.
+
+        Returns:
+            str or None: The name of the first exhausted limit, or None while within budget.
+        """
+        if self.max_expansions is not None and expanded >= self.max_expansions:
+            return "max_expansions"
+        if self.max_open is not None and open_size > self.max_open:
+            return "max_open"
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            return "time_limit"
+        return None
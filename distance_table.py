@@ -0,0 +1,185 @@
+import mmap
+import os
+import sys
+import tempfile
+
+from utils import MOVES, data_dir, encode_state, generate_goal_state
+
+MAGIC = b"N8DT"
+VERSION = 1
+SIZE = 181440  # Solvable 3x3 states: 9 blank positions x 8!/2 even tile orders
+UNSEEN = 255
+FACTORIALS = [1, 1, 2, 6, 24, 120, 720, 5040, 40320]
+
+# Tables already memory-mapped by this process, keyed by path; None for tables found missing
+_tables = {}
+
+def rank(state):
+    """
+    Map a solvable 3x3 state to its index in the distance table, a perfect hash in 0..181439.
+
+    On a 3x3 board the order of the eight tiles read row by row, ignoring the blank, is always an
+    even permutation for solvable states. Its Lehmer code rank halved is therefore unique among
+    the 8!/2 even orders, and combined with the blank position it numbers every solvable state.
+
+    Parameters:
+        state (bytes): The flat encoding of a solvable 3x3 state.
+
+    Returns:
+        int: blank position * 20160 + Lehmer rank of the tile order // 2.
+    """
+    tiles = [tile for tile in state if tile != 0]
+    index = 0
+    for i, tile in enumerate(tiles):
+        smaller = 0
+        for later in tiles[i + 1:]:
+            if later < tile:
+                smaller += 1
+        index += smaller * FACTORIALS[7 - i]
+    return state.index(0) * (FACTORIALS[8] // 2) + index // 2
+
+def table_path(directory=None, create=True):
+    """
+    Return the path of the 3x3 distance table file.
+
+    Parameters:
+        directory (str, optional): The directory holding the table, utils.data_dir() by default.
+        create (bool, optional): Create the default directory if it does not exist.
+
+    Returns:
+        str: The path of the table file.
+    """
+    return os.path.join(directory or data_dir(create), "8puzzle.bin")
+
+def build_table(vectorize=None):
+    """
+    Compute the exact distance of every solvable 3x3 state by breadth-first search from the goal.
+
+    Parameters:
+        vectorize (bool, optional): Expand each layer as one NumPy array (see vectorized.build_table),
+                                    several times faster. By default NumPy is used when it is installed.
+
+    Returns:
+        bytearray: table[rank(state)] is the optimal number of moves from state to the goal.
+
+    Raises:
+        ImportError: If vectorize is True and NumPy is not installed.
+    """
+    if vectorize is not False:
+        # Imported here: NumPy is slow to import and only needed to build the table
+        import vectorized
+        if vectorize or vectorized.available():
+            return vectorized.build_table()
+
+    # Blank moves for every blank index of a 3x3 board
+    transitions = []
+    for blank in range(9):
+        i, j = divmod(blank, 3)
+        transitions.append([(i + di) * 3 + j + dj for di, dj, _ in MOVES if 0 <= i + di < 3 and 0 <= j + dj < 3])
+
+    goal = encode_state(generate_goal_state(3))
+    table = bytearray([UNSEEN]) * SIZE
+    table[rank(goal)] = 0
+    layer = [(goal, goal.index(0))]
+    depth = 0
+    while layer:
+        depth += 1
+        next_layer = []
+        for state, blank in layer:
+            for target in transitions[blank]:
+                child = bytearray(state)
+                child[blank], child[target] = child[target], 0
+                child = bytes(child)
+                index = rank(child)
+                if table[index] == UNSEEN:
+                    table[index] = depth
+                    next_layer.append((child, target))
+        layer = next_layer
+    return table
+
+def save_table(table, path):
+    """
+    Write the distance table atomically: a short header followed by one byte per state.
+
+    Parameters:
+        table (bytearray): The table returned by build_table.
+        path (str): The destination path.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(MAGIC + bytes([VERSION]))
+            file.write(table)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def load_table(directory=None, build=False):
+    """
+    Memory-map the 3x3 distance table, optionally building it first.
+
+    Without build, nothing is created on disk: a missing directory or file means there is no table,
+    and that answer is remembered, so solving many 3x3 boards does not look for the file each time.
+    A table built later by another process is picked up by new processes.
+
+    Parameters:
+        directory (str, optional): The directory holding the table, utils.data_dir() by default.
+        build (bool, optional): Build and save the table if the file does not exist yet.
+
+    Returns:
+        memoryview or None: The table indexed by rank, or None if it is missing and build is False.
+
+    Raises:
+        ValueError: If the file is not a 3x3 distance table.
+    """
+    path = table_path(directory, create=build)
+    if path in _tables and (_tables[path] is not None or not build):
+        return _tables[path]
+    if not os.path.exists(path):
+        if not build:
+            _tables[path] = None
+            return None
+        save_table(build_table(), path)
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    header = MAGIC + bytes([VERSION])
+    if view[:len(header)] != header or len(view) != len(header) + SIZE:
+        raise ValueError(f"{path} is not a 3x3 distance table.")
+    _tables[path] = view[len(header):]
+    return _tables[path]
+
+def lookup(puzzle, table, return_path=False):
+    """
+    Answer a solvable 3x3 puzzle from the distance table.
+
+    The path is found by greedy descent: from each state, move to any successor whose stored
+    distance is one less, which is always possible and always optimal.
+
+    Parameters:
+        puzzle (NPuzzle): A solvable 3x3 puzzle.
+        table (memoryview): The table returned by load_table.
+        return_path (bool, optional): Also return the moves of an optimal solution.
+
+    Returns:
+        int or tuple: The optimal cost, or (cost, path) with return_path, as returned by NPuzzle.solve.
+    """
+    cost = table[rank(puzzle.start)]
+    if not return_path:
+        return cost
+    path = []
+    state, blank, distance = puzzle.start, puzzle.start.index(0), cost
+    while distance > 0:
+        for child, child_blank, move in puzzle.successors(state, blank):
+            if table[rank(child)] == distance - 1:
+                path.append(MOVES[move][2])
+                state, blank, distance = child, child_blank, distance - 1
+                break
+    return cost, path
+
+if __name__ == "__main__":
+    # Build (or rebuild) the table: python distance_table.py [DIRECTORY]
+    destination = table_path(sys.argv[1] if len(sys.argv) > 1 else None)
+    save_table(build_table(), destination)
+    print("Distance table written to", destination)
@@ -0,0 +1,295 @@
+import heapq
+import itertools
+import os
+import shutil
+import tempfile
+
+from budget import BudgetExceeded
+from heuristics import DELTA_TABLES
+from utils import MOVES
+
+# Sorted runs kept per bucket before they are merged into one
+MAX_RUNS = 32
+# Records read from a file at a time
+READ_RECORDS = 4096
+# The two tiles packed into each byte value
+_PAIRS = [bytes((byte >> 4, byte & 15)) for byte in range(256)]
+
+def record_size(n):
+    """
+    Return the size in bytes of a packed n x n state.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+
+    Returns:
+        int: Half a byte per tile up to 4x4 boards, one byte per tile above.
+    """
+    return (n * n + 1) // 2 if n * n <= 16 else n * n
+
+def pack(state, n):
+    """
+    Pack a flat state into a fixed-size record whose byte order sorts like the state.
+
+    Parameters:
+        state (bytes): The flat encoding of the state.
+        n (int): The dimension of the puzzle (n x n).
+
+    Returns:
+        bytes: The record, two tiles per byte (high nibble first) up to 4x4 boards.
+    """
+    if n * n > 16:
+        return bytes(state)
+    if len(state) % 2:
+        state = bytes(state) + b"\0"
+    return bytes(high << 4 | low for high, low in zip(state[::2], state[1::2]))
+
+def unpack(record, n):
+    """
+    Unpack a record written by pack.
+
+    Parameters:
+        record (bytes): The packed state.
+        n (int): The dimension of the puzzle (n x n).
+
+    Returns:
+        bytes: The flat encoding of the state.
+    """
+    if n * n > 16:
+        return bytes(record)
+    return b"".join(_PAIRS[byte] for byte in record)[:n * n]
+
+def read_records(path, size):
+    """
+    Stream the fixed-size records of a file, reading it in blocks.
+
+    Parameters:
+        path (str): The file to read.
+        size (int): The size of a record in bytes.
+
+    Yields:
+        bytes: Each record, in file order.
+    """
+    with open(path, "rb") as file:
+        while True:
+            block = file.read(size * READ_RECORDS)
+            if not block:
+                return
+            for offset in range(0, len(block), size):
+                yield block[offset:offset + size]
+
+def contains(path, record):
+    """
+    Binary-search a sorted file of fixed-size records.
+
+    Parameters:
+        path (str): The sorted file.
+        record (bytes): The record to look for.
+
+    Returns:
+        bool: Whether the file holds the record.
+    """
+    size = len(record)
+    with open(path, "rb") as file:
+        low, high = 0, os.path.getsize(path) // size
+        while low < high:
+            middle = (low + high) // 2
+            file.seek(middle * size)
+            found = file.read(size)
+            if found == record:
+                return True
+            if found < record:
+                low = middle + 1
+            else:
+                high = middle
+    return False
+
+def external_astar(puzzle, directory=None, memory_limit=1000000, return_path=False, stats=None,
+                   progress=None, progress_every=10000, budget=None):
+    """
+    Solve a sliding puzzle with External A*, keeping the open and closed lists on disk.
+
+    States are grouped into buckets by (g, h) and buckets are expanded in order of f = g + h, then
+    g. Successors are buffered in memory and, once memory_limit states are buffered, written to
+    their bucket as sorted runs of packed records (see pack). Duplicates are detected late: when a
+    bucket is expanded, its runs are merged with heapq.merge, repeated states are dropped and so
+    are states already expanded in buckets (g - 1, h), (g - 2, h) and (g, h) itself. Moves are
+    reversible and every state has a single h, so with a consistent heuristic those are the only
+    buckets where an earlier copy of a state can be. The merged bucket is written back as a sorted
+    file and streamed through the expansion, so only the buffers and one block per file are held in
+    RAM.
+
+    The sorted bucket files are kept until the search ends. With return_path, the solution is
+    traced back from the goal by binary-searching each neighbor in the bucket one level up.
+
+    Parameters:
+        puzzle (NPuzzle): The puzzle to solve.
+        directory (str, optional): Where to create the temporary bucket files; the system temporary
+                                   directory by default. They are deleted when the search ends.
+        memory_limit (int, optional): Maximum number of generated states buffered in RAM.
+        return_path (bool, optional): Also return the moves of the solution.
+        stats (SearchStats, optional): Statistics to fill in; iterations counts expanded buckets,
+                                       duplicates_skipped the duplicates removed by the merges,
+                                       peak_open the largest number of buffered states and
+                                       peak_closed the number of states stored on disk.
+        progress (function, optional): Called with stats every progress_every expansions.
+        progress_every (int, optional): Number of expansions between progress calls.
+        budget (Budget, optional): Limits on the search; max_open bounds the states buffered in RAM.
+
+    Returns:
+        int or tuple: The optimal cost, or (cost, path) with return_path, as returned by
+                      NPuzzle.solve; -1 if the puzzle is unsolvable.
+
+    Raises:
+        BudgetExceeded: If the budget runs out before the goal is reached.
+    """
+    n = puzzle.n
+    size = record_size(n)
+    heuristic = puzzle.heuristic
+    initial_h = heuristic(n, puzzle.start)
+    delta_table = DELTA_TABLES.get(heuristic)
+    # Buckets hold h rounded (see bucket_h), so only integer heuristics can be updated incrementally
+    integer_h = isinstance(initial_h, int)
+    delta = delta_table(n) if delta_table is not None and integer_h else None
+    workspace = tempfile.mkdtemp(prefix="npuzzle-", dir=directory)
+
+    runs = {}  # (g, h) -> sorted run files not merged yet
+    buffers = {}  # (g, h) -> packed states generated since the last flush
+    closed = {}  # (g, h) -> sorted files of the expanded bucket, one per expansion
+    numbers = itertools.count()  # Unique file names
+    buffered = 0
+    stored = 0
+    expanded = 0
+
+    def new_file():
+        return os.path.join(workspace, f"{next(numbers)}.bin")
+
+    def write_run(key, records):
+        path = new_file()
+        with open(path, "wb") as file:
+            file.write(b"".join(records))
+        runs.setdefault(key, []).append(path)
+
+    def flush():
+        # Spill every buffer as a sorted run, compacting buckets with too many runs
+        nonlocal buffered
+        for key, records in buffers.items():
+            records.sort()
+            write_run(key, records)
+            if len(runs[key]) >= MAX_RUNS:
+                merged = list(runs.pop(key))
+                path = new_file()
+                with open(path, "wb") as file:
+                    for record in heapq.merge(*(read_records(run, size) for run in merged)):
+                        file.write(record)
+                for run in merged:
+                    os.remove(run)
+                runs[key] = [path]
+        buffers.clear()
+        buffered = 0
+
+    def unique(key):
+        # Merge the runs and the buffer of a bucket, dropping repeated states and states of older buckets
+        nonlocal stored, buffered
+        g, h = key
+        sources = [read_records(run, size) for run in runs.pop(key, ())]
+        if key in buffers:
+            records = buffers.pop(key)
+            buffered -= len(records)
+            records.sort()
+            sources.append(records)
+        older = [read_records(file, size) for previous in ((g - 1, h), (g - 2, h), key)
+                 for file in closed.get(previous, ())]
+        older = heapq.merge(*older)
+        old = next(older, None)
+        last = None
+        path = new_file()
+        with open(path, "wb") as file:
+            for record in heapq.merge(*sources):
+                while old is not None and old < record:
+                    old = next(older, None)
+                if record == last or record == old:
+                    if stats is not None:
+                        stats.duplicates_skipped += 1
+                    continue
+                last = record
+                file.write(record)
+                stored += 1
+                yield record
+        closed.setdefault(key, []).append(path)
+
+    def trace(goal_key):
+        # Walk back from the goal through the closed buckets one level up
+        path = []
+        state, g = puzzle.goal, goal_key[0]
+        while g > 0:
+            for child, _, move in puzzle.successors(state, state.index(0)):
+                key = (g - 1, bucket_h(heuristic(n, child)))
+                if any(contains(file, pack(child, n)) for file in closed.get(key, ())):
+                    # The parent reached state with the inverse move (see utils.MOVES)
+                    path.append(MOVES[move ^ 1][2])
+                    state, g = child, g - 1
+                    break
+            else:
+                raise RuntimeError("The search files do not hold a path to the goal.")
+        path.reverse()
+        return path
+
+    if integer_h:
+        def bucket_h(h):
+            return h
+    else:
+        # Evaluations of a real-valued heuristic that differ by rounding errors share a bucket
+        def bucket_h(h):
+            return round(h, 9)
+
+    try:
+        buffers[(0, bucket_h(initial_h))] = [pack(puzzle.start, n)]
+        buffered = 1
+        while buffers or runs:
+            # The next bucket: smallest f, then smallest g. Rounding f keeps buckets of equal f in g
+            # order; a bucket that still receives states after its expansion is expanded again
+            key = min(set(runs) | set(buffers), key=lambda bucket: (bucket_h(bucket[0] + bucket[1]), bucket[0]))
+            g, h = key
+            if stats is not None:
+                stats.iterations += 1
+            for record in unique(key):
+                state = unpack(record, n)
+                if state == puzzle.goal:
+                    puzzle.nodes_expanded = expanded
+                    if stats is not None:
+                        stats.peak_closed = stored
+                    if return_path:
+                        return g, trace(key)
+                    return g
+                if budget is not None:
+                    reason = budget.exceeded(expanded, buffered)
+                    if reason is not None:
+                        puzzle.nodes_expanded = expanded
+                        raise BudgetExceeded(reason, expanded)
+                expanded += 1
+                blank = state.index(0)
+                children = puzzle.successors(state, blank)
+                if stats is not None:
+                    stats.nodes_generated += len(children)
+                    if progress is not None and expanded % progress_every == 0:
+                        stats.nodes_expanded = expanded
+                        stats.peak_closed = stored
+                        progress(stats)
+                for child, child_blank, move in children:
+                    if delta is not None:
+                        child_h = h + delta[state[child_blank]][child_blank][move]
+                    else:
+                        child_h = heuristic(n, child)
+                    buffers.setdefault((g + 1, bucket_h(child_h)), []).append(pack(child, n))
+                    buffered += 1
+                if stats is not None and buffered > stats.peak_open:
+                    stats.peak_open = buffered
+                if buffered >= memory_limit:
+                    flush()
+        puzzle.nodes_expanded = expanded
+        return (-1, None) if return_path else -1
+    finally:
+        if stats is not None:
+            stats.peak_closed = stored
+        shutil.rmtree(workspace, ignore_errors=True)
@@ -1,4 +1,8 @@
 import math
+from functools import lru_cache
+
+from pattern_db import pattern_database
+from utils import MOVES
 
 def manhattan(n, state):
     """
@@ -9,25 +13,23 @@ def manhattan(n, state):
 
     Parameters:
         n (int): The dimension of the puzzle (n x n).
-        state (list of list of int): The current state of the puzzle represented as a 2D list, where 
-                                     each element corresponds to a tile (0 represents the blank).
+        state (bytes or sequence of int): The flat, row-major encoding of the puzzle state (see 
+                                          utils.encode_state), where 0 represents the blank.
 
     Returns:
         int: The total Manhattan distance for the puzzle state.
     """
     distance = 0  # Initialize total distance to 0
     
-    # Iterate over each row
-    for i in range(n):
-        # Iterate over each column in the current row
-        for j in range(n):
-            val = state[i][j]  # Current tile value
-            # Skip the blank tile (represented by 0)
-            if val != 0:
-                # Calculate the target (goal) position for the current tile
-                target_i, target_j = (val - 1) // n, (val - 1) % n
-                # Compute Manhattan distance (vertical + horizontal distance)
-                distance += abs(target_i - i) + abs(target_j - j)
+    # Iterate over each position of the flat state
+    for pos, val in enumerate(state):
+        # Skip the blank tile (represented by 0)
+        if val != 0:
+            i, j = divmod(pos, n)  # Current row and column
+            # Calculate the target (goal) position for the current tile
+            target_i, target_j = (val - 1) // n, (val - 1) % n
+            # Compute Manhattan distance (vertical + horizontal distance)
+            distance += abs(target_i - i) + abs(target_j - j)
     return distance
 
 def euclidean(n, state):
@@ -39,23 +41,391 @@ def euclidean(n, state):
 
     Parameters:
         n (int): The dimension of the puzzle (n x n).
-        state (list of list of int): The current state of the puzzle represented as a 2D list, where 
-                                     each element corresponds to a tile (0 represents the blank).
+        state (bytes or sequence of int): The flat, row-major encoding of the puzzle state (see 
+                                          utils.encode_state), where 0 represents the blank.
 
     Returns:
         float: The total Euclidean distance for the puzzle state.
     """
     distance = 0  # Initialize total distance to 0
     
-    # Iterate over each row
-    for i in range(n):
-        # Iterate over each column in the current row
-        for j in range(n):
-            val = state[i][j]  # Current tile value
-            # Skip the blank tile (represented by 0)
-            if val != 0:
-                # Calculate the target (goal) position for the current tile
-                target_i, target_j = (val - 1) // n, (val - 1) % n
-                # Compute Euclidean distance (straight-line distance) and add to total
-                distance += math.sqrt((target_i - i)**2 + (target_j - j)**2)
-    return distance
\ No newline at end of file
+    # Iterate over each position of the flat state
+    for pos, val in enumerate(state):
+        # Skip the blank tile (represented by 0)
+        if val != 0:
+            i, j = divmod(pos, n)  # Current row and column
+            # Calculate the target (goal) position for the current tile
+            target_i, target_j = (val - 1) // n, (val - 1) % n
+            # Compute Euclidean distance (straight-line distance) and add to total
+            distance += math.sqrt((target_i - i)**2 + (target_j - j)**2)
+    return distance
+
+@lru_cache(maxsize=None)
+def manhattan_table(n):
+    """
+    Precompute the Manhattan distance of every tile from every position, once per board size.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+
+    Returns:
+        list of lists of int: table[tile][pos] is the Manhattan distance of tile from its goal 
+                              position when placed at flat index pos (0 for the blank).
+    """
+    table = [[0] * (n * n) for _ in range(n * n)]
+    for tile in range(1, n * n):
+        target_i, target_j = (tile - 1) // n, (tile - 1) % n
+        for pos in range(n * n):
+            i, j = divmod(pos, n)
+            table[tile][pos] = abs(target_i - i) + abs(target_j - j)
+    return table
+
+@lru_cache(maxsize=None)
+def euclidean_table(n):
+    """
+    Precompute the Euclidean distance of every tile from every position, once per board size.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+
+    Returns:
+        list of lists of float: table[tile][pos] is the Euclidean distance of tile from its goal 
+                                position when placed at flat index pos (0 for the blank).
+    """
+    table = [[0.0] * (n * n) for _ in range(n * n)]
+    for tile in range(1, n * n):
+        target_i, target_j = (tile - 1) // n, (tile - 1) % n
+        for pos in range(n * n):
+            i, j = divmod(pos, n)
+            table[tile][pos] = math.sqrt((target_i - i)**2 + (target_j - j)**2)
+    return table
+
+def build_delta_table(n, distances):
+    """
+    Build the per-move heuristic change table from a per-tile/per-position distance table.
+
+    When the blank moves in direction MOVES[move] into flat index pos, the tile at pos slides 
+    the opposite way into the blank's old cell. delta[tile][pos][move] is the resulting change 
+    in the heuristic, so a child's value is its parent's value plus a single table read.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+        distances (list of lists): table[tile][pos] as returned by manhattan_table or euclidean_table.
+
+    Returns:
+        list of lists of lists: delta[tile][pos][move], 0 for moves that leave the board.
+    """
+    delta = [[[0] * len(MOVES) for _ in range(n * n)] for _ in range(n * n)]
+    for tile in range(1, n * n):
+        for pos in range(n * n):
+            i, j = divmod(pos, n)
+            for move, (di, dj, _) in enumerate(MOVES):
+                # The tile moves against the blank's direction
+                new_i, new_j = i - di, j - dj
+                if 0 <= new_i < n and 0 <= new_j < n:
+                    delta[tile][pos][move] = distances[tile][new_i * n + new_j] - distances[tile][pos]
+    return delta
+
+@lru_cache(maxsize=None)
+def manhattan_delta_table(n):
+    """
+    Return the cached Manhattan delta table for an n x n board (see build_delta_table).
+    """
+    return build_delta_table(n, manhattan_table(n))
+
+@lru_cache(maxsize=None)
+def euclidean_delta_table(n):
+    """
+    Return the cached Euclidean delta table for an n x n board (see build_delta_table).
+    """
+    return build_delta_table(n, euclidean_table(n))
+
+def manhattan_delta(n, h, tile, pos, move):
+    """
+    Update a parent's Manhattan distance for a single move in O(1).
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+        h (int): The Manhattan distance of the parent state.
+        tile (int): The tile that slides into the blank's cell.
+        pos (int): The flat index of that tile in the parent state (the child's blank index).
+        move (int): The index in MOVES of the blank's move.
+
+    Returns:
+        int: The Manhattan distance of the child state.
+    """
+    return h + manhattan_delta_table(n)[tile][pos][move]
+
+def euclidean_delta(n, h, tile, pos, move):
+    """
+    Update a parent's Euclidean distance for a single move in O(1), without calling math.sqrt.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+        h (float): The Euclidean distance of the parent state.
+        tile (int): The tile that slides into the blank's cell.
+        pos (int): The flat index of that tile in the parent state (the child's blank index).
+        move (int): The index in MOVES of the blank's move.
+
+    Returns:
+        float: The Euclidean distance of the child state.
+    """
+    return h + euclidean_delta_table(n)[tile][pos][move]
+
+# Heuristics that support incremental evaluation, mapped to their delta table builders
+DELTA_TABLES = {}
+
+@lru_cache(maxsize=None)
+def line_conflict_table(n):
+    """
+    Precompute the linear-conflict penalty of every possible line, once per board size.
+
+    A line (row or column) is described by the goal coordinate along the line of each of its tiles 
+    whose goal lies in that line, and 0 for the other cells. Tiles in their goal line but in reversed 
+    order must leave the line to pass each other; the minimum number of tiles that have to leave is 
+    the line length of such tiles minus their longest increasing subsequence, and each costs two 
+    extra moves on top of Manhattan.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+
+    Returns:
+        list of int: table[key] is the extra moves for the line encoded as 
+                     key = sum((goal coordinate + 1) * (n + 1)**k) over its cells k.
+    """
+    table = [0] * ((n + 1) ** n)
+    for key in range(len(table)):
+        # Decode the goal coordinates of the tiles that belong to this line, in line order
+        goals = []
+        rest = key
+        for _ in range(n):
+            rest, digit = divmod(rest, n + 1)
+            if digit:
+                goals.append(digit)
+        # Longest increasing subsequence of the goal coordinates
+        longest = [1] * len(goals)
+        for i in range(len(goals)):
+            for j in range(i):
+                if goals[j] < goals[i] and longest[j] + 1 > longest[i]:
+                    longest[i] = longest[j] + 1
+        table[key] = 2 * (len(goals) - max(longest, default=0))
+    return table
+
+@lru_cache(maxsize=None)
+def line_key_tables(n):
+    """
+    Precompute, for every tile and position, its contribution to the row key and column key used 
+    by line_conflict_table.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+
+    Returns:
+        tuple: (row_keys, col_keys), where row_keys[tile][pos] is the tile's contribution to the key 
+               of its current row (0 unless the row is its goal row), and likewise for columns.
+    """
+    row_keys = [[0] * (n * n) for _ in range(n * n)]
+    col_keys = [[0] * (n * n) for _ in range(n * n)]
+    for tile in range(1, n * n):
+        target_i, target_j = (tile - 1) // n, (tile - 1) % n
+        for pos in range(n * n):
+            i, j = divmod(pos, n)
+            if i == target_i:
+                row_keys[tile][pos] = (target_j + 1) * (n + 1) ** j
+            if j == target_j:
+                col_keys[tile][pos] = (target_i + 1) * (n + 1) ** i
+    return row_keys, col_keys
+
+def linear_conflict(n, state):
+    """
+    Calculate the Manhattan distance plus linear conflicts for a sliding puzzle.
+
+    Every tile contributes its Manhattan distance and its share of the key of its row and column; 
+    the extra moves caused by reversed tiles are then read from line_conflict_table with one 
+    lookup per row and column.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+        state (bytes or sequence of int): The flat, row-major encoding of the puzzle state (see 
+                                          utils.encode_state), where 0 represents the blank.
+
+    Returns:
+        int: The Manhattan distance plus the linear-conflict penalty of the puzzle state.
+    """
+    distances = manhattan_table(n)
+    row_keys, col_keys = line_key_tables(n)
+    conflicts = line_conflict_table(n)
+    rows = [0] * n
+    cols = [0] * n
+    distance = 0
+    for pos, tile in enumerate(state):
+        if tile != 0:
+            distance += distances[tile][pos]
+            rows[pos // n] += row_keys[tile][pos]
+            cols[pos % n] += col_keys[tile][pos]
+    for key in rows:
+        distance += conflicts[key]
+    for key in cols:
+        distance += conflicts[key]
+    return distance
+
+# Largest board for which the walking-distance table is practical to build
+MAX_WALKING_DISTANCE_N = 4
+
+@lru_cache(maxsize=None)
+def walking_distance_table(n):
+    """
+    Precompute the walking distance of every vertical tile arrangement by breadth-first search.
+
+    The vertical arrangement of a board is the n x n matrix counting, for each row, how many of its 
+    tiles have their goal in each row; the blank sits in the row holding n - 1 tiles. A vertical move 
+    of the blank exchanges it with any tile of an adjacent row. The arrangement is encoded as an 
+    integer with 3 bits per count, and the breadth-first search from the goal arrangement gives the 
+    number of vertical moves needed to sort the rows. Horizontal moves are handled by the same table 
+    applied to columns, since the goal layout is symmetric under transposition.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+
+    Returns:
+        dict: Maps every reachable encoded arrangement to its walking distance.
+
+    Raises:
+        ValueError: If n is larger than MAX_WALKING_DISTANCE_N.
+    """
+    if n > MAX_WALKING_DISTANCE_N:
+        raise ValueError(f"Walking distance is only available up to {MAX_WALKING_DISTANCE_N}x{MAX_WALKING_DISTANCE_N} boards.")
+
+    def encode(counts):
+        key = 0
+        for index, count in enumerate(counts):
+            key |= count << (3 * index)
+        return key
+
+    # Goal arrangement: every tile in its goal row, the blank in the last row
+    goal = [0] * (n * n)
+    for row in range(n):
+        goal[row * n + row] = n if row < n - 1 else n - 1
+    table = {encode(goal): 0}
+    layer = [(goal, n - 1)]
+    depth = 0
+    while layer:
+        depth += 1
+        next_layer = []
+        for counts, blank in layer:
+            for row in (blank - 1, blank + 1):
+                if not 0 <= row < n:
+                    continue
+                # Move a tile of any goal row from the adjacent row into the blank's row
+                for target in range(n):
+                    if counts[row * n + target]:
+                        child = list(counts)
+                        child[row * n + target] -= 1
+                        child[blank * n + target] += 1
+                        key = encode(child)
+                        if key not in table:
+                            table[key] = depth
+                            next_layer.append((child, row))
+        layer = next_layer
+    return table
+
+@lru_cache(maxsize=None)
+def walking_key_tables(n):
+    """
+    Precompute, for every tile and position, its contribution to the encoded vertical and 
+    horizontal arrangements used by walking_distance_table.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+
+    Returns:
+        tuple: (vertical, horizontal), where vertical[tile][pos] adds one to the count of the tile's 
+               goal row within its current row, and horizontal does the same for columns.
+    """
+    vertical = [[0] * (n * n) for _ in range(n * n)]
+    horizontal = [[0] * (n * n) for _ in range(n * n)]
+    for tile in range(1, n * n):
+        target_i, target_j = (tile - 1) // n, (tile - 1) % n
+        for pos in range(n * n):
+            i, j = divmod(pos, n)
+            vertical[tile][pos] = 1 << (3 * (i * n + target_i))
+            horizontal[tile][pos] = 1 << (3 * (j * n + target_j))
+    return vertical, horizontal
+
+def walking_distance(n, state):
+    """
+    Calculate the walking-distance heuristic for a sliding puzzle.
+
+    The walking distance is the number of vertical moves needed to bring every tile into its goal 
+    row plus the number of horizontal moves needed to bring every tile into its goal column, each 
+    ignoring the order of tiles within a row or column. Both are single lookups in 
+    walking_distance_table once the arrangements are encoded.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+        state (bytes or sequence of int): The flat, row-major encoding of the puzzle state (see 
+                                          utils.encode_state), where 0 represents the blank.
+
+    Returns:
+        int: The walking distance of the puzzle state.
+    """
+    table = walking_distance_table(n)
+    vertical, horizontal = walking_key_tables(n)
+    key_v = key_h = 0
+    for pos, tile in enumerate(state):
+        if tile != 0:
+            key_v += vertical[tile][pos]
+            key_h += horizontal[tile][pos]
+    return table[key_v] + table[key_h]
+
+# Registered heuristics: code -> (display name, function)
+HEURISTICS = {}
+
+# Largest supported board dimension of the heuristics that have one: function -> n
+MAX_SIZES = {}
+
+class UnsupportedHeuristic(ValueError):
+    """
+    Raised when a heuristic is selected for a board size it does not support.
+    """
+
+def register_heuristic(code, name, function, delta_table=None, max_n=None):
+    """
+    Make a heuristic selectable by its code in NPuzzle and main.py.
+
+    Parameters:
+        code (str): The code used to select the heuristic, e.g. "m".
+        name (str): The display name of the heuristic.
+        function (function): The heuristic, called as function(n, state) on the flat encoding.
+        delta_table (function, optional): Builds the delta table of the heuristic for a board size 
+                                          (see build_delta_table), enabling incremental evaluation.
+        max_n (int, optional): The largest board dimension the heuristic supports, if any.
+    """
+    HEURISTICS[code] = (name, function)
+    if delta_table is not None:
+        DELTA_TABLES[function] = delta_table
+    if max_n is not None:
+        MAX_SIZES[function] = max_n
+
+def check_heuristic_size(code, n):
+    """
+    Check that a registered heuristic supports an n x n board.
+
+    Parameters:
+        code (str): The heuristic code.
+        n (int): The dimension of the puzzle (n x n).
+
+    Raises:
+        UnsupportedHeuristic: If the board is larger than the heuristic's max_n.
+    """
+    name, function = HEURISTICS[code]
+    max_n = MAX_SIZES.get(function)
+    if max_n is not None and n > max_n:
+        raise UnsupportedHeuristic(f"The {name} heuristic ({code!r}) only supports boards up to "
+                                   f"{max_n}x{max_n}; choose another heuristic for {n}x{n} boards.")
+
+register_heuristic("m", "Manhattan", manhattan, manhattan_delta_table)
+register_heuristic("e", "Euclidean", euclidean, euclidean_delta_table)
+register_heuristic("p", "Pattern Database", pattern_database)
+register_heuristic("l", "Linear Conflict", linear_conflict)
+register_heuristic("w", "Walking Distance", walking_distance, max_n=MAX_WALKING_DISTANCE_N)
@@ -0,0 +1,148 @@
+import math
+import time
+from collections import OrderedDict
+
+from budget import BudgetExceeded
+from heuristics import DELTA_TABLES
+from utils import MOVES
+
+def ida_star(puzzle, transposition_size=None, return_path=False, stats=None, progress=None, progress_every=10000,
+             budget=None):
+    """
+    Solve a sliding puzzle with iterative-deepening A* (IDA*).
+
+    Each iteration runs a depth-first search that prunes every node whose f = g + h exceeds the
+    current threshold; the next threshold is the smallest f that was pruned. The board is a single
+    mutable buffer updated in place and undone on backtrack, and the move that would undo the
+    parent's move is never generated, so memory is proportional to the solution depth.
+
+    An optional transposition table remembers the smallest g at which each state was reached in
+    the current iteration and prunes re-visits with an equal or larger g. It is bounded and evicts
+    the least recently used state when full.
+
+    Parameters:
+        puzzle (NPuzzle): The puzzle to solve.
+        transposition_size (int, optional): Maximum number of states kept in the transposition
+                                            table. None or 0 disables the table.
+        return_path (bool, optional): Also return the moves of the solution, read off the
+                                      depth-first search stack.
+        stats (SearchStats, optional): Statistics to fill in; peak_open is the deepest stack, 
+                                       peak_closed the largest transposition table and 
+                                       duplicates_skipped the transposition-table prunes.
+        progress (function, optional): Called with stats every progress_every expansions.
+        progress_every (int, optional): Number of expansions between progress calls.
+        budget (Budget, optional): Limits on the search; max_open bounds the depth of the stack.
+
+    Returns:
+        int: The optimal number of moves to reach the goal state, or -1 if the puzzle is unsolvable. 
+             The number of nodes expanded over all iterations is stored in puzzle.nodes_expanded.
+             With return_path, a tuple (cost, path) as returned by NPuzzle.solve.
+
+    Raises:
+        BudgetExceeded: If the budget runs out before the goal is reached.
+    """
+    n = puzzle.n
+    goal = puzzle.goal
+    transitions = puzzle.transitions
+    heuristic = puzzle.heuristic
+    delta_table = DELTA_TABLES.get(heuristic)
+    delta = delta_table(n) if delta_table is not None else None
+
+    state = bytearray(puzzle.start)  # Single board mutated in place by the search
+    table = OrderedDict() if transposition_size else None
+    initial_h = heuristic(n, state)
+    threshold = initial_h
+    solution = []  # Cost of the solution once the goal is found
+    stack = []  # Moves from the initial state to the current node
+    expanded = 0
+    clock = time.perf_counter
+
+    def search(g, blank, h, previous):
+        """
+        Depth-first search below the current node.
+
+        Returns:
+            float: -1 if the goal was found, otherwise the smallest f that exceeded the threshold.
+        """
+        nonlocal expanded
+        f = g + h
+        if f > threshold:
+            return f
+        if state == goal:
+            solution.append(g)
+            return -1
+
+        if table is not None:
+            key = bytes(state)
+            seen = table.get(key)
+            # A visit with an equal or smaller g already explored this subtree with more budget
+            if seen is not None and seen <= g:
+                table.move_to_end(key)
+                if stats is not None:
+                    stats.duplicates_skipped += 1
+                return math.inf
+            table[key] = g
+            table.move_to_end(key)
+            if len(table) > transposition_size:
+                table.popitem(last=False)  # Evict the least recently used state
+
+        if budget is not None:
+            reason = budget.exceeded(expanded, len(stack))
+            if reason is not None:
+                puzzle.nodes_expanded = expanded
+                raise BudgetExceeded(reason, expanded)
+        expanded += 1
+        if stats is not None:
+            stats.nodes_generated += len(transitions[blank]) - (previous >= 0)
+            if len(stack) > stats.peak_open:
+                stats.peak_open = len(stack)
+            if table is not None and len(table) > stats.peak_closed:
+                stats.peak_closed = len(table)
+            if progress is not None and expanded % progress_every == 0:
+                stats.nodes_expanded = expanded
+                progress(stats)
+        minimum = math.inf
+        for target, move in transitions[blank]:
+            # Parent-move pruning: never move the blank straight back
+            if target == previous:
+                continue
+            tile = state[target]
+            # Calculate the heuristic for the child before the board is modified
+            if delta is not None:
+                child_h = h + delta[tile][target][move]
+            # Slide the tile into the blank's cell
+            state[blank], state[target] = tile, 0
+            stack.append(move)
+            if delta is None:
+                if stats is None:
+                    child_h = heuristic(n, state)
+                else:
+                    started = clock()
+                    child_h = heuristic(n, state)
+                    stats.heuristic_time += clock() - started
+            result = search(g + 1, target, child_h, blank)
+            if result == -1:
+                return -1
+            # Undo the move on backtrack
+            stack.pop()
+            state[blank], state[target] = 0, tile
+            if result < minimum:
+                minimum = result
+        return minimum
+
+    # Deepen the threshold until the goal is found or the search space is exhausted
+    while True:
+        if table is not None:
+            table.clear()
+        if stats is not None:
+            stats.iterations += 1
+        result = search(0, puzzle.start.index(0), initial_h, -1)
+        if result == -1:
+            puzzle.nodes_expanded = expanded
+            if return_path:
+                return solution[0], [MOVES[move][2] for move in stack]
+            return solution[0]
+        if result == math.inf:
+            puzzle.nodes_expanded = expanded
+            return (-1, None) if return_path else -1
+        threshold = result
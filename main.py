@@ -1,57 +1,221 @@
-from n_puzzle import NPuzzle
-from utils import read_puzzle
+import argparse
+import contextlib
+import json
+import logging
 import sys
+import time
 
-def main():
+from n_puzzle import NPuzzle, MODES
+from budget import BudgetExceeded
+from heuristics import HEURISTICS, UnsupportedHeuristic
+from utils import check_puzzle_size, iter_puzzles
+
+def build_parser():
     """
-    Main function to run the NPuzzle solver.
+    Build the command-line parser of the solver.
 
-    This function performs the following steps:
-      1. Reads the puzzle configuration from the file 'n-puzzle.txt'.
-      2. Processes command-line arguments to determine which heuristic to use:
-         - 'm' for Manhattan (default)
-         - 'e' for Euclidean
-      3. Initializes the NPuzzle instance with the given configuration.
-      4. Attempts to solve the puzzle using the NPuzzle solver.
-      5. Prints the number of moves to reach the solution or a message if no solution is found.
+    Returns:
+        argparse.ArgumentParser: The parser used by main.
     """
-    # Define the file path for the puzzle configuration
-    file_path = 'n-puzzle.txt'
-    
-    # Attempt to read the puzzle configuration from file
-    try:
-        initial_state = read_puzzle(file_path)
-    except Exception as e:
-        print(f"Error reading puzzle file: {e}")
-        return
-    
-    # Process command-line argument for heuristic selection
-    try:
-        heuristic = sys.argv[1]
-        # Validate that the provided heuristic is either 'm' (Manhattan) or 'e' (Euclidean)
-        if heuristic not in "me":
-            print("No such heuristic")
-            print("Usage:")
-            print(" e - Euclidean\n m (default) - Manhattan")
-            return
-    except IndexError:
-        # If no heuristic argument is provided, default to Manhattan ('m')
-        heuristic = "m"
-
-    # Attempt to initialize the NPuzzle with the initial state and chosen heuristic
+    heuristics = ", ".join(f"{code} = {name}" for code, (name, _) in HEURISTICS.items())
+    parser = argparse.ArgumentParser(description="Solve sliding puzzles read from a file or stdin.")
+    parser.add_argument("heuristic", nargs="?", default="m", choices=list(HEURISTICS), metavar="heuristic",
+                        help=f"heuristic code: {heuristics} (default: m)")
+    parser.add_argument("mode", nargs="?", default="astar", choices=list(MODES), metavar="mode",
+                        help=f"search mode: {', '.join(MODES)} (default: astar)")
+    parser.add_argument("-f", "--file", default="n-puzzle.txt",
+                        help="puzzle file, one or more puzzles (text or JSON lines); '-' reads stdin "
+                             "(default: n-puzzle.txt)")
+    parser.add_argument("--format", choices=("text", "json"), default="text",
+                        help="text messages or one JSON object per puzzle (default: text)")
+    # Destinations are separate options, so a flag never takes the positional arguments after it
+    parser.add_argument("--path", action="store_true", help="also give the moves of each solution")
+    parser.add_argument("--path-file", default=None, metavar="FILE",
+                        help="write the moves of each solution to FILE (implies --path)")
+    parser.add_argument("--stats", action="store_true", help="also give the search statistics")
+    parser.add_argument("--stats-file", default=None, metavar="FILE",
+                        help="write the search statistics to FILE as JSON lines (implies --stats)")
+    parser.add_argument("--cache", action="store_true",
+                        help="answer boards solved before from the default solution cache")
+    parser.add_argument("--cache-db", default=None, metavar="DB",
+                        help="use the solution cache database DB (implies --cache)")
+    parser.add_argument("--time-limit", type=float, default=None, metavar="SECONDS", help="time allowed per puzzle")
+    parser.add_argument("--max-expansions", type=int, default=None, metavar="N", help="node expansions allowed per puzzle")
+    parser.add_argument("--max-open", type=int, default=None, metavar="N", help="open-list size allowed per puzzle")
+    parser.add_argument("--weight", type=float, default=None, help="heuristic weight of the weighted and anytime modes")
+    parser.add_argument("--processes", type=int, default=None, metavar="N",
+                        help="worker processes of the parallel mode (default: all cores)")
+    parser.add_argument("--memory-limit", type=int, default=None, metavar="N",
+                        help="states the external mode buffers in RAM before writing them to disk")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log the solver's progress messages to stderr")
+    return parser
+
+def solve_puzzle(index, initial_state, args, cache=None, path_file=None, stats_file=None):
+    """
+    Solve one puzzle and print its outcome in the requested format.
+
+    Parameters:
+        index (int): The position of the puzzle in the input.
+        initial_state (list of lists of int): The puzzle configuration.
+        args (argparse.Namespace): The parsed command line (see build_parser).
+        cache (SolutionCache, optional): Cache consulted before and updated after the search.
+        path_file (file, optional): Open file receiving the moves instead of the output.
+        stats_file (file, optional): Open file receiving the statistics instead of the output.
+
+    Returns:
+        bool: False if the puzzle was invalid, ran out of budget or needs a missing optional
+              dependency.
+    """
+    text = args.format == "text"
+    # Only forward the options that were given, so every engine accepts them
+    options = {name: value for name, value in (("time_limit", args.time_limit),
+                                                ("max_expansions", args.max_expansions),
+                                                ("max_open", args.max_open), ("weight", args.weight),
+                                                ("processes", args.processes),
+                                                ("memory_limit", args.memory_limit))
+               if value is not None}
+    return_path = args.path
+    want_stats = args.stats
+
+    started = time.perf_counter()
     try:
-        puzzle = NPuzzle(initial_state, heuristic=heuristic)
-    except ValueError as ve:
-        print(f"Invalid puzzle configuration: {ve}")
-        return
-
-    # Solve the puzzle and capture the solution cost (number of moves)
-    solution = puzzle.solve()
-    if solution != -1:
+        check_puzzle_size(initial_state)
+        puzzle = NPuzzle(initial_state, heuristic=args.heuristic, mode=args.mode)
+        solution = puzzle.solve(return_path=return_path, stats=want_stats, cache=cache, **options)
+    except (ValueError, BudgetExceeded, ImportError) as error:
+        # ImportError: a mode whose optional dependency is missing (e.g. "vectorized" without NumPy)
+        if not text:
+            print(json.dumps({"index": index, "error": str(error)}), flush=True)
+        elif isinstance(error, ImportError):
+            print(f"Mode unavailable: {error}")
+        elif isinstance(error, BudgetExceeded):
+            print(f"No solution found within the budget: {error}")
+        elif isinstance(error, UnsupportedHeuristic):
+            print(f"Unsupported heuristic: {error}")
+        else:
+            print(f"Invalid puzzle configuration: {error}")
+        return False
+
+    path = stats = None
+    if want_stats:
+        *solution, stats = solution
+        solution = solution if return_path else solution[0]
+    if return_path:
+        solution, path = solution
+    result = {"index": index, "cost": solution, "nodes_expanded": puzzle.nodes_expanded,
+              "time": time.perf_counter() - started}
+    if puzzle.suboptimality > 1:
+        result["suboptimality"] = puzzle.suboptimality
+
+    # Statistics and moves go to their own files when given, otherwise into the output
+    if stats is not None:
+        if stats_file is not None:
+            stats_file.write(json.dumps({"index": index, **stats.to_dict()}) + "\n")
+        elif text:
+            print(stats.to_json())
+        else:
+            result["stats"] = stats.to_dict()
+    if path is not None:
+        if path_file is not None:
+            path_file.write("".join(move + "\n" for move in path) + "\n")
+        elif not text:
+            result["path"] = path
+
+    if not text:
+        print(json.dumps(result), flush=True)
+    elif not puzzle.solvable:
+        print("Puzzle is not solvable.")
+    elif solution != -1:
         print("Solution found in", solution, "moves")
+        if puzzle.suboptimality > 1:
+            print(f"At most {puzzle.suboptimality:.3f} times the optimal number of moves")
+        if path is not None:
+            if path_file is not None:
+                print("Moves written to", args.path_file)
+            else:
+                print("Moves:", " ".join(path))
     else:
         print("No solution found.")
-        
-        
+    return True
+
+def main(argv=None):
+    """
+    Main function to run the NPuzzle solver.
+
+    This function performs the following steps:
+      1. Parses the command line (see build_parser): the heuristic code ('m' by default) and search
+         mode ('astar' by default) as positional arguments, the puzzle file ('n-puzzle.txt' by
+         default, '-' for stdin) and the output options.
+      2. Streams the puzzles of the file one at a time, so files of any size can be solved.
+      3. Initializes an NPuzzle instance for each configuration, rejects unsolvable configurations
+         and solves the others with the chosen heuristic, mode and budget.
+      4. Prints the number of moves of each solution, as text or as one JSON object per puzzle.
+
+    '--path' also gives the moves of each solution and '--path-file FILE' writes them to FILE, one
+    move per line with a blank line after each puzzle. Likewise '--stats' gives the search statistics
+    and '--stats-file FILE' writes them to FILE as JSON lines. Path tracking and statistics are only
+    enabled when requested. '--cache' answers boards solved before from the default solution cache,
+    '--cache-db DB' from DB. '--time-limit', '--max-expansions' and '--max-open' bound each search, and
+    '--weight' sets the heuristic weight of the 'weighted' and 'anytime' modes, '--processes' the 
+    number of worker processes of the 'parallel' mode and '--memory-limit' the number of states the 
+    'external' mode buffers in RAM.
+
+    Solver engines and the solution cache are imported only when they are used, and nothing but
+    the results is printed unless '--verbose' is given, so the command starts fast in pipelines.
+
+    Parameters:
+        argv (list of str, optional): The command-line arguments, sys.argv[1:] by default.
+
+    Returns:
+        int: The exit status: 0 on success, 1 if the file could not be read, an output file could
+             not be written, a puzzle was invalid or ran out of budget, or the mode needs a
+             missing optional dependency.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.weight is not None and args.mode not in ("weighted", "anytime"):
+        parser.error("--weight only applies to the weighted and anytime modes")
+    if args.processes is not None and args.mode != "parallel":
+        parser.error("--processes only applies to the parallel mode")
+    if args.memory_limit is not None and args.mode != "external":
+        parser.error("--memory-limit only applies to the external mode")
+    args.path = args.path or args.path_file is not None
+    args.stats = args.stats or args.stats_file is not None
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    # Every file opened below is closed on the way out, including when a later one fails to open
+    with contextlib.ExitStack() as resources:
+        try:
+            stream = sys.stdin if args.file == "-" else resources.enter_context(open(args.file))
+        except OSError as e:
+            print(f"Error reading puzzle file: {e}", file=sys.stderr)
+            return 1
+        try:
+            path_file = resources.enter_context(open(args.path_file, "w")) if args.path_file else None
+            stats_file = resources.enter_context(open(args.stats_file, "w")) if args.stats_file else None
+        except OSError as e:
+            print(f"Error writing output file: {e}", file=sys.stderr)
+            return 1
+
+        cache = None
+        if args.cache or args.cache_db is not None:
+            from solution_cache import SolutionCache
+            cache = SolutionCache(args.cache_db)
+            resources.callback(cache.close)
+        status = 0
+        try:
+            for index, initial_state in enumerate(iter_puzzles(stream)):
+                if index and args.format == "text":
+                    print()
+                if not solve_puzzle(index, initial_state, args, cache, path_file, stats_file):
+                    status = 1
+        except ValueError as ve:
+            # Raised by the parser: the rest of the stream cannot be trusted
+            print(f"Error reading puzzle file: {ve}", file=sys.stderr)
+            status = 1
+    return status
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
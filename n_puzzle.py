@@ -1,6 +1,52 @@
-from queue import PriorityQueue
-from heuristics import *
-from utils import generate_goal_state, find_blank
+import functools
+import importlib
+import logging
+import time
+
+from heuristics import DELTA_TABLES, HEURISTICS, check_heuristic_size
+from budget import Budget, BudgetExceeded
+from open_list import OPEN_LISTS
+from search_stats import SearchStats
+from utils import MOVES, generate_goal_state, encode_state, decode_state, validate_puzzle, is_solvable
+
+# Search modes selectable from the constructor. A* is implemented by NPuzzle.solve itself; other
+# modes map to the (module, function) implementing them, imported only when they are used.
+MODES = {
+    "astar": None,
+    "ida": ("ida", "ida_star"),
+    "parallel": ("parallel", "parallel_ida_star"),
+    "bidirectional": ("bidirectional", "bidirectional_astar"),
+    "external": ("external", "external_astar"),
+    "vectorized": ("vectorized", "layered_astar"),
+    "weighted": ("suboptimal", "weighted_astar"),
+    "greedy": ("suboptimal", "greedy_best_first"),
+    "anytime": ("suboptimal", "anytime_astar"),
+}
+
+logger = logging.getLogger(__name__)
+
+def build_transitions(n):
+    """
+    Precompute, for every blank index of a flat n x n board, the indices the blank can move to.
+    
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+    
+    Returns:
+        list of lists: transitions[blank] is a list of (target index, move index) pairs, where the 
+                       move index refers to an entry of MOVES.
+    """
+    transitions = []
+    for blank in range(n * n):
+        blank_i, blank_j = divmod(blank, n)
+        targets = []
+        for move, (di, dj, _) in enumerate(MOVES):
+            new_i, new_j = blank_i + di, blank_j + dj
+            # Keep only moves that stay within the puzzle boundaries
+            if 0 <= new_i < n and 0 <= new_j < n:
+                targets.append((new_i * n + new_j, move))
+        transitions.append(targets)
+    return transitions
 
 class NPuzzle:
     """
@@ -10,25 +56,49 @@ class NPuzzle:
         n (int): The dimension of the puzzle.
         initial_state (tuple of tuples): The immutable initial puzzle configuration.
         heuristic (function): The heuristic function to estimate distance to the goal.
+        mode (str): The search mode used by solve (see MODES).
+        solvable (bool): Whether the goal state can be reached from the initial state.
+        nodes_expanded (int): The number of nodes expanded by the last call to solve.
+        suboptimality (float): Proven bound on the ratio between the cost returned by the last call 
+                               to solve and the optimal cost; 1.0 for optimal solutions.
         goal_state (tuple of tuples): The goal configuration of the puzzle.
+        start (bytes): The flat encoding of the initial state used internally by the search.
+        goal (bytes): The flat encoding of the goal state.
+        transitions (list of lists): Precomputed blank moves for every blank index (see build_transitions).
     """
     
-    def __init__(self, initial_state, heuristic="m"):
+    def __init__(self, initial_state, heuristic="m", mode="astar"):
         """
         Initialize the NPuzzle instance with the given initial state and heuristic choice.
         
-        The initial state is validated to ensure that it is an n x n matrix. The puzzle state is 
-        converted to an immutable tuple-of-tuples. The chosen heuristic function is set based on 
-        the input ("m" for Manhattan, "e" for Euclidean). If an invalid heuristic is provided, 
-        it defaults to Manhattan.
+        The initial state is validated to ensure that it is an n x n matrix holding a permutation of 
+        0..n*n - 1, and its solvability is determined up front by inversion parity. The puzzle state is 
+        converted to an immutable tuple-of-tuples. The chosen heuristic function is looked up by its 
+        code in heuristics.HEURISTICS. If an invalid heuristic is provided, it defaults to Manhattan.
+        Nothing is printed: the choice is reported through the "n_puzzle" logger, at INFO level.
         
         Parameters:
             initial_state (list of lists of int): The starting configuration of the puzzle.
-            heuristic (str, optional): The heuristic type: "m" for Manhattan (default) or "e" for Euclidean.
+            heuristic (str, optional): The heuristic code: "m" for Manhattan (default), "e" for Euclidean, 
+                                       "p" for additive pattern databases, "l" for linear conflict or 
+                                       "w" for walking distance.
+            mode (str, optional): The search mode: "astar" (default), "ida" for memory-bounded 
+                                  iterative-deepening A*, "parallel" for IDA* spread over several 
+                                  processes, "bidirectional" for bidirectional A*, "external" 
+                                  for A* with its open and closed lists on disk, "vectorized" 
+                                  for A* expanding whole f-layers on NumPy arrays, or 
+                                  the bounded-suboptimal "weighted" (weighted A*), "greedy" (greedy 
+                                  best-first) and "anytime" (anytime weighted A*).
         
         Raises:
-            ValueError: If any row in the initial state does not contain exactly n elements.
+            ValueError: If any row in the initial state does not contain exactly n elements, if the 
+                        tiles are not a permutation of 0..n*n - 1, or if the search mode is unknown.
+            UnsupportedHeuristic: If the heuristic does not support boards of this size (a 
+                                  ValueError; see heuristics.check_heuristic_size).
         """
+        if mode not in MODES:
+            raise ValueError(f"Unknown search mode {mode!r}; expected one of {sorted(MODES)}.")
+        self.mode = mode
         self.n = len(initial_state)
         # Validate that each row has exactly n elements
         for idx, row in enumerate(initial_state):
@@ -36,24 +106,51 @@ class NPuzzle:
                 raise ValueError(
                     f"Row {idx+1} has {len(row)} elements but each row must have {self.n} elements with empty tab representing the blank."
                 )
+        validate_puzzle(initial_state)
+        # Check solvability by inversion parity instead of exhausting the reachable state space
+        self.solvable = is_solvable(initial_state)
         # Convert the initial state to an immutable tuple-of-tuples
         self.initial_state = tuple(tuple(row) for row in initial_state)
         
-        # Choose the heuristic function based on the provided argument
-        if heuristic == "e":
-            print("Using Euclidean")
-            self.heuristic = euclidean
-        elif heuristic == "m":
-            print("Using Manhattan")
-            self.heuristic = manhattan
-        else:
+        # Choose the heuristic function from the registry based on the provided argument
+        if heuristic not in HEURISTICS:
             # Default to Manhattan if the input is not recognized
-            print("Unknown heuristic provided, defaulting to Manhattan")
-            self.heuristic = manhattan
+            logger.warning("Unknown heuristic %r, defaulting to Manhattan", heuristic)
+            heuristic = "m"
+        check_heuristic_size(heuristic, self.n)
+        name, self.heuristic = HEURISTICS[heuristic]
+        logger.info("Using %s", name)
         
         # Generate the goal state for the puzzle
         self.goal_state = generate_goal_state(self.n)
         
+        # Compact flat encodings used by the search; tuple-of-tuples only appear at the API boundary
+        self.start = encode_state(self.initial_state)
+        self.goal = encode_state(self.goal_state)
+        self.transitions = build_transitions(self.n)
+        self.nodes_expanded = 0
+        self.suboptimality = 1.0
+        
+    def successors(self, state, blank):
+        """
+        Generate the successors of a flat encoded state by a single swap of the blank tile.
+        
+        Parameters:
+            state (bytes): The flat encoding of the current puzzle configuration.
+            blank (int): The index of the blank tile in state.
+        
+        Returns:
+            list of tuples: (child state, child blank index, move index) for every valid move.
+        """
+        children = []
+        for target, move in self.transitions[blank]:
+            child = bytearray(state)
+            # The tile next to the blank slides into the blank's cell
+            child[blank] = child[target]
+            child[target] = 0
+            children.append((bytes(child), target, move))
+        return children
+
     def get_neighbors(self, state):
         """
         Generate all valid neighboring states by moving the blank tile in the current state.
@@ -67,67 +164,296 @@ class NPuzzle:
         Returns:
             list of tuples: A list of neighboring puzzle states.
         """
-        # Locate the blank tile (0) in the current state
-        blank_i, blank_j = find_blank(state, self.n)
-        neighbors = []
+        encoded = encode_state(state)
+        # Expand the flat encoding and convert each child back at the API boundary
+        return [decode_state(child, self.n) for child, _, _ in self.successors(encoded, encoded.index(0))]
+    
+    def reconstruct_path(self, parents, state, root=None):
+        """
+        Rebuild the moves leading to a state from a map of the move that last reached each state.
         
-        # Define possible moves: (row offset, column offset, move description)
-        moves = [(0, 1, 'Right'), (0, -1, 'Left'), (1, 0, 'Down'), (-1, 0, 'Up')]
+        Only the move index is stored per state; each parent is recovered by undoing that move, 
+        so no parent state has to be kept.
         
-        # Try each possible move
-        for di, dj, move in moves:
-            new_i, new_j = blank_i + di, blank_j + dj
-            # Check if the new position is within puzzle boundaries
-            if 0 <= new_i < self.n and 0 <= new_j < self.n:
-                # Create a mutable copy of the current state to perform the swap
-                new_state = [list(row) for row in state]
-                # Swap the blank tile with the adjacent tile
-                new_state[blank_i][blank_j], new_state[new_i][new_j] = new_state[new_i][new_j], new_state[blank_i][blank_j]
-                # Convert the state back to an immutable tuple-of-tuples and add to neighbors list
-                neighbors.append(tuple(tuple(row) for row in new_state))
-        return neighbors
+        Parameters:
+            parents (dict): Maps a flat encoded state to the index in MOVES of the move that reached it. 
+                            The root state is absent.
+            state (bytes): The flat encoding of the state to trace back from.
+            root (bytes, optional): The state the search started from, the initial state by default.
+        
+        Returns:
+            list of str: The move descriptions ('Right', 'Left', 'Down', 'Up') from the root state.
+        """
+        root = self.start if root is None else root
+        path = []
+        current = bytearray(state)
+        blank = current.index(0)
+        while bytes(current) != root:
+            move = parents[bytes(current)]
+            di, dj, label = MOVES[move]
+            path.append(label)
+            # Undo the move: the blank goes back to where it came from
+            previous = blank - (di * self.n + dj)
+            current[blank], current[previous] = current[previous], 0
+            blank = previous
+        path.reverse()
+        return path
     
-    def solve(self):
+    def apply_path(self, path):
         """
-        Solve the sliding puzzle using the A* search algorithm.
+        Replay a sequence of moves from the initial state.
         
-        The method uses a priority queue to explore states based on the sum of the path cost 
-        and heuristic value. The search continues until the goal state is reached, and the number 
-        of moves (cost) is returned. Additionally, the number of nodes expanded during the search 
-        is printed for analysis. If no solution exists, -1 is returned.
+        Parameters:
+            path (list of str): Move descriptions ('Right', 'Left', 'Down', 'Up') of the blank tile.
+        
+        Returns:
+            tuple of tuples: The puzzle configuration reached after the moves.
+        
+        Raises:
+            ValueError: If a move is unknown or would leave the board.
+        """
+        labels = {label: move for move, (_, _, label) in enumerate(MOVES)}
+        state, blank = self.start, self.start.index(0)
+        for label in path:
+            for child, child_blank, move in self.successors(state, blank):
+                if move == labels.get(label):
+                    state, blank = child, child_blank
+                    break
+            else:
+                raise ValueError(f"Move {label!r} is not possible from the current state.")
+        return decode_state(state, self.n)
+    
+    def solve(self, open_list="heap", return_path=False, stats=False, progress=None, progress_every=10000,
+              cache=None, use_table=True, time_limit=None, max_expansions=None, max_open=None, **options):
+        """
+        Solve the sliding puzzle using the A* search algorithm, or the engine of the selected mode.
+        
+        The method uses an open list to explore states based on the sum of the path cost 
+        and heuristic value. A map of the best known path cost of every generated state ensures 
+        that a state is only pushed again when it is reached by a strictly cheaper path, so 
+        dominated duplicates never enter the open list and stale entries are skipped when popped. 
+        The search continues until the goal state is reached, and the number of moves (cost) is 
+        returned. The number of nodes expanded is stored in nodes_expanded for analysis. If no 
+        solution exists, -1 is returned.
+        
+        Path tracking is opt-in: with return_path, the move that last improved each state is kept in 
+        a parent map holding only the move index, and the optimal move sequence is rebuilt from the 
+        goal with reconstruct_path. Cost-only runs keep no parent information at all.
+        
+        Statistics are opt-in as well: with stats or a progress callback, the search fills a 
+        SearchStats object with node counts, open/closed sizes and heuristic versus successor 
+        timings. Without them no counter or timer is touched.
+        
+        With a SolutionCache, boards solved before (or their mirror images across the main diagonal) 
+        are answered from the cache without searching, and new solutions are stored in it.
+        
+        3x3 puzzles are answered by a lookup in the complete distance table (see distance_table.py) 
+        whenever it has been built, and their paths by greedy descent through it.
+        
+        Budgets bound the search: wall time, expansions and open-list size. An optimal engine that 
+        exhausts its budget raises BudgetExceeded. The "weighted" and "greedy" modes return a quickly 
+        found solution, and "anytime" returns the best solution found when the budget expires; the 
+        proven bound on their suboptimality is stored in suboptimality. Only optimal solutions are 
+        stored in the cache.
+        
+        Parameters:
+            open_list (str, optional): The open-list backend (see open_list.OPEN_LISTS): "heap" (default) 
+                                       for a binary heap or "bucket" for a bucket queue keyed on the 
+                                       integer f value, which requires an integer-valued heuristic.
+            return_path (bool, optional): Also return the sequence of moves of an optimal solution.
+            stats (bool, optional): Also return the SearchStats of the search.
+            progress (function, optional): Called with the live SearchStats every progress_every expansions.
+            progress_every (int, optional): Number of expansions between progress calls, 10000 by default.
+            cache (SolutionCache, optional): Cache consulted before and updated after the search.
+            use_table (bool, optional): Answer 3x3 puzzles from the distance table when it exists on 
+                                        disk (default). Pass False to force a search.
+            time_limit (float, optional): Wall-clock seconds the search may take.
+            max_expansions (int, optional): Maximum number of node expansions.
+            max_open (int, optional): Maximum size of the open list (for "ida", the search depth).
+            **options: Options specific to the engine of the selected mode, e.g. transposition_size 
+                       for "ida" (the maximum number of states kept in its LRU transposition table), 
+                       processes for "parallel" (all cores by default), directory and memory_limit 
+                       for "external" (where the bucket files go and how many states are buffered 
+                       in RAM) or weight for "weighted" and "anytime" (2.0 by default).
         
         Returns:
             int: The number of moves to reach the goal state, or -1 if the puzzle is unsolvable.
+            With return_path, a tuple (cost, path) where path is the list of moves of the blank tile 
+            ('Right', 'Left', 'Down', 'Up'), or None if the puzzle is unsolvable. With stats, the 
+            SearchStats is appended: (cost, stats) or (cost, path, stats).
+        
+        Raises:
+            ValueError: If the open-list backend is unknown or does not support the heuristic.
+            BudgetExceeded: If the budget runs out before a solution is found. Its stats attribute 
+                            holds the statistics collected so far when they were requested.
+        """
+        self.nodes_expanded = 0
+        self.suboptimality = 1.0
+        search_stats = SearchStats() if stats or progress is not None else None
+        
+        # Boards solved before are answered from the cache without expanding any node
+        hit = None
+        if cache is not None and self.solvable:
+            hit = cache.get(self.start, self.n, need_path=return_path)
+        # Every solvable 3x3 board is a single lookup once the distance table is built
+        table = None
+        if self.n == 3 and use_table and self.solvable and hit is None:
+            from distance_table import load_table
+            table = load_table()
+        
+        # Unsolvable puzzles are rejected without searching
+        if not self.solvable:
+            result = (-1, None) if return_path else -1
+        elif hit is not None:
+            result = hit if return_path else hit[0]
+        elif table is not None:
+            from distance_table import lookup
+            result = lookup(self, table, return_path=return_path)
+        else:
+            if self.mode == "astar":
+                engine = self._astar
+                options["open_list"] = open_list
+            else:
+                # Import the engine of the selected mode on first use
+                module, name = MODES[self.mode]
+                engine = functools.partial(getattr(importlib.import_module(module), name), self)
+            if time_limit is not None or max_expansions is not None or max_open is not None:
+                options["budget"] = Budget(time_limit, max_expansions, max_open)
+            
+            if search_stats is None:
+                result = engine(return_path=return_path, **options)
+            else:
+                started = time.perf_counter()
+                try:
+                    result = engine(return_path=return_path, stats=search_stats, progress=progress,
+                                    progress_every=progress_every, **options)
+                except BudgetExceeded as exceeded:
+                    exceeded.stats = search_stats
+                    raise
+                finally:
+                    search_stats.elapsed = time.perf_counter() - started
+                    search_stats.nodes_expanded = self.nodes_expanded
+            
+            # Suboptimal solutions would be served later as optimal ones
+            if (cache is not None and self.suboptimality == 1.0
+                    and (result[0] if return_path else result) != -1):
+                if return_path:
+                    cache.put(self.start, self.n, result[0], result[1])
+                else:
+                    cache.put(self.start, self.n, result)
+        
+        if not stats:
+            return result
+        return (*result, search_stats) if return_path else (result, search_stats)
+    
+    def _astar(self, open_list="heap", return_path=False, stats=None, progress=None, progress_every=10000,
+               budget=None):
+        """
+        Run the A* search described in solve.
+        
+        Parameters:
+            open_list (str, optional): The open-list backend.
+            return_path (bool, optional): Also return the sequence of moves.
+            stats (SearchStats, optional): Statistics to fill in, or None to collect nothing.
+            progress (function, optional): Called with stats every progress_every expansions.
+            progress_every (int, optional): Number of expansions between progress calls.
+            budget (Budget, optional): Limits on the search.
+        
+        Returns:
+            int or tuple: The cost, or (cost, path) with return_path, as returned by solve.
+        
+        Raises:
+            BudgetExceeded: If the budget runs out before the goal is reached.
         """
-        # Initialize the priority queue; each item is a tuple (priority, cost, state)
-        priority_queue = PriorityQueue()
-        initial_heuristic = self.heuristic(self.n, self.initial_state)
-        priority_queue.put((initial_heuristic, 0, self.initial_state))
+        if open_list not in OPEN_LISTS:
+            raise ValueError(f"Unknown open list {open_list!r}; expected one of {sorted(OPEN_LISTS)}.")
+        
+        # Heuristics with a delta table are updated in O(1) per move instead of rescanning the board
+        delta_table = DELTA_TABLES.get(self.heuristic)
+        delta = delta_table(self.n) if delta_table is not None else None
+        
+        initial_heuristic = self.heuristic(self.n, self.start)
+        if open_list == "bucket" and not isinstance(initial_heuristic, int):
+            raise ValueError("The bucket open list requires an integer-valued heuristic.")
+        
+        # Initialize the open list; each item is a tuple (priority, cost, state, blank, heuristic)
+        frontier = OPEN_LISTS[open_list]()
+        frontier.push((initial_heuristic, 0, self.start, self.start.index(0), initial_heuristic))
         
-        visited = set()  # Set to track visited states and avoid revisiting
+        # Best known path cost of every generated state; replaces the visited set
+        best_g = {self.start: 0}
+        # Move index that last improved each state, only kept when the path is requested
+        parents = {} if return_path else None
+        expanded = 0
+        clock = time.perf_counter
         
-        # A* search loop: process nodes until the queue is empty or the goal is reached
-        while not priority_queue.empty():
-            _, cost, current_state = priority_queue.get()
+        # A* search loop: process nodes until the open list is empty or the goal is reached
+        while frontier:
+            _, cost, current_state, blank, current_h = frontier.pop()
+            
+            # Skip stale entries superseded by a cheaper path to the same state
+            if cost > best_g[current_state]:
+                if stats is not None:
+                    stats.duplicates_skipped += 1
+                continue
             
             # Check if the goal state has been reached
-            if current_state == self.goal_state:
+            if current_state == self.goal:
+                self.nodes_expanded = expanded
+                if stats is not None:
+                    stats.peak_closed = len(best_g)
+                if return_path:
+                    return cost, self.reconstruct_path(parents, current_state)
                 return cost
             
-            # Skip processing if the current state has already been visited
-            if current_state in visited:
-                continue
+            if budget is not None:
+                reason = budget.exceeded(expanded, len(frontier))
+                if reason is not None:
+                    self.nodes_expanded = expanded
+                    if stats is not None:
+                        stats.peak_closed = len(best_g)
+                    raise BudgetExceeded(reason, expanded)
+            
+            expanded += 1
+            new_cost = cost + 1  # Increment path cost for the move
             
-            # Mark the current state as visited
-            visited.add(current_state)
+            if stats is None:
+                children = self.successors(current_state, blank)
+            else:
+                # Instrumented expansion: time successor generation and track sizes
+                started = clock()
+                children = self.successors(current_state, blank)
+                stats.successor_time += clock() - started
+                stats.nodes_generated += len(children)
+                if len(frontier) > stats.peak_open:
+                    stats.peak_open = len(frontier)
+                if progress is not None and expanded % progress_every == 0:
+                    stats.nodes_expanded = expanded
+                    stats.peak_closed = len(best_g)
+                    progress(stats)
             
             # Process all valid neighboring states
-            for neighbor in self.get_neighbors(current_state):
-                if neighbor not in visited:
-                    new_cost = cost + 1  # Increment path cost for the move
+            for neighbor, neighbor_blank, move in children:
+                # Only push the neighbor if this path improves on the best known one
+                if new_cost < best_g.get(neighbor, new_cost + 1):
+                    best_g[neighbor] = new_cost
+                    if parents is not None:
+                        parents[neighbor] = move
                     # Calculate the heuristic for the neighbor
-                    h = self.heuristic(self.n, neighbor)
-                    # Add the neighbor to the queue with priority as cost + heuristic
-                    priority_queue.put((new_cost + h, new_cost, neighbor))
+                    if stats is not None:
+                        started = clock()
+                    if delta is not None:
+                        h = current_h + delta[current_state[neighbor_blank]][neighbor_blank][move]
+                    else:
+                        h = self.heuristic(self.n, neighbor)
+                    if stats is not None:
+                        stats.heuristic_time += clock() - started
+                    # Add the neighbor to the open list with priority as cost + heuristic
+                    frontier.push((new_cost + h, new_cost, neighbor, neighbor_blank, h))
+                elif stats is not None:
+                    stats.duplicates_skipped += 1
         
-        return -1
\ No newline at end of file
+        self.nodes_expanded = expanded
+        if stats is not None:
+            stats.peak_closed = len(best_g)
+        return (-1, None) if return_path else -1
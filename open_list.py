@@ -0,0 +1,102 @@
+import heapq
+
+class HeapOpenList:
+    """
+    Binary heap open list for A* built on heapq, without the locking done by queue.PriorityQueue.
+
+    Entries are tuples whose first element is the priority (f = g + h); ties are broken by the
+    remaining tuple elements, exactly as the previous PriorityQueue did.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty heap.
+        """
+        self.heap = []
+
+    def push(self, entry):
+        """
+        Add an entry to the open list.
+
+        Parameters:
+            entry (tuple): A tuple whose first element is the priority of the entry.
+        """
+        heapq.heappush(self.heap, entry)
+
+    def pop(self):
+        """
+        Remove and return the entry with the lowest priority.
+
+        Returns:
+            tuple: The entry with the lowest priority.
+        """
+        return heapq.heappop(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+class BucketOpenList:
+    """
+    Bucket queue open list keyed on an integer priority.
+
+    Each priority value owns a list of entries, so push and pop are O(1) apart from advancing
+    the minimum pointer over empty buckets. Within a bucket entries are popped last-in first-out,
+    which favors the deepest recently generated nodes among those with equal f. Only valid for
+    integer-valued heuristics such as Manhattan.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty bucket queue.
+        """
+        self.buckets = []
+        self.minimum = 0  # Lowest priority that may hold entries
+        self.size = 0
+
+    def push(self, entry):
+        """
+        Add an entry to the bucket of its priority.
+
+        Parameters:
+            entry (tuple): A tuple whose first element is the integer priority of the entry.
+
+        Raises:
+            TypeError: If the priority is not an integer.
+        """
+        priority = entry[0]
+        if not isinstance(priority, int):
+            raise TypeError(f"Bucket open list requires integer priorities, got {priority!r}.")
+        # Grow the bucket array on demand
+        while len(self.buckets) <= priority:
+            self.buckets.append([])
+        self.buckets[priority].append(entry)
+        if priority < self.minimum:
+            self.minimum = priority
+        self.size += 1
+
+    def pop(self):
+        """
+        Remove and return the most recently pushed entry of the lowest non-empty bucket.
+
+        Returns:
+            tuple: The entry with the lowest priority.
+
+        Raises:
+            IndexError: If the open list is empty.
+        """
+        if not self.size:
+            raise IndexError("pop from an empty open list")
+        # Advance to the first non-empty bucket
+        while not self.buckets[self.minimum]:
+            self.minimum += 1
+        self.size -= 1
+        return self.buckets[self.minimum].pop()
+
+    def __len__(self):
+        return self.size
+
+# Available open-list backends for NPuzzle.solve
+OPEN_LISTS = {
+    "heap": HeapOpenList,
+    "bucket": BucketOpenList,
+}
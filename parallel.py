@@ -0,0 +1,305 @@
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from budget import BudgetExceeded
+from heuristics import DELTA_TABLES
+from n_puzzle import build_transitions
+from utils import MOVES
+
+# Search context of a worker process, set once by _init_worker
+_context = {}
+
+# Expansions between checks of the stop signal and the deadline
+CHECK_EVERY = 4096
+
+class _Stop(Exception):
+    """
+    Unwinds the depth-first search of a worker when it must stop early.
+    """
+
+def _init_worker(n, goal, heuristic, stop=None):
+    """
+    Prepare the search context of a worker process.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+        goal (bytes): The flat encoding of the goal state.
+        heuristic (function): The heuristic function of the puzzle.
+        stop (multiprocessing.Event, optional): Set by the coordinator once a solution is found.
+    """
+    delta_table = DELTA_TABLES.get(heuristic)
+    _context.update(n=n, goal=goal, heuristic=heuristic, stop=stop,
+                    delta=delta_table(n) if delta_table is not None else None,
+                    transitions=build_transitions(n))
+
+def _search_subtree(state, blank, g, h, previous, threshold, max_expansions=None, deadline=None):
+    """
+    Run one bounded depth-first iteration of IDA* below a frontier node.
+
+    Parameters:
+        state (bytes): The flat encoding of the frontier node.
+        blank (int): The index of its blank tile.
+        g (int): Its depth from the initial state.
+        h (float): Its heuristic value.
+        previous (int): The blank index of its parent, -1 for the root; the move back is pruned.
+        threshold (float): The bound on f = g + h of the current iteration.
+        max_expansions (int, optional): Expansions allowed for this subtree.
+        deadline (float, optional): time.time() value at which the search must stop.
+
+    Returns:
+        dict: cost (None unless the goal was found), moves (from the frontier node to the goal),
+              next (the smallest f that exceeded the threshold), expanded, generated, pid, time
+              (seconds) and stopped (None, "stop", "max_expansions" or "time_limit").
+    """
+    n, goal, heuristic = _context["n"], _context["goal"], _context["heuristic"]
+    delta, transitions, stop = _context["delta"], _context["transitions"], _context["stop"]
+    board = bytearray(state)  # Single board mutated in place, as in ida_star
+    moves = []
+    counters = [0, 0]  # Expanded, generated
+    started = time.perf_counter()
+
+    def search(g, blank, h, previous):
+        f = g + h
+        if f > threshold:
+            return f
+        if board == goal:
+            return -1
+        if max_expansions is not None and counters[0] >= max_expansions:
+            raise _Stop("max_expansions")
+        counters[0] += 1
+        if counters[0] % CHECK_EVERY == 0:
+            if stop is not None and stop.is_set():
+                raise _Stop("stop")
+            if deadline is not None and time.time() > deadline:
+                raise _Stop("time_limit")
+        minimum = math.inf
+        for target, move in transitions[blank]:
+            # Parent-move pruning: never move the blank straight back
+            if target == previous:
+                continue
+            counters[1] += 1
+            tile = board[target]
+            if delta is not None:
+                child_h = h + delta[tile][target][move]
+            board[blank], board[target] = tile, 0
+            if delta is None:
+                child_h = heuristic(n, board)
+            moves.append(move)
+            result = search(g + 1, target, child_h, blank)
+            if result == -1:
+                return -1
+            moves.pop()
+            board[blank], board[target] = 0, tile
+            if result < minimum:
+                minimum = result
+        return minimum
+
+    outcome = {"cost": None, "moves": None, "next": math.inf, "stopped": None}
+    try:
+        result = search(g, blank, h, previous)
+        if result == -1:
+            outcome.update(cost=g + len(moves), moves=list(moves))
+        else:
+            outcome["next"] = result
+    except _Stop as stopped:
+        outcome["stopped"] = stopped.args[0]
+    outcome.update(expanded=counters[0], generated=counters[1], pid=os.getpid(),
+                   time=time.perf_counter() - started)
+    return outcome
+
+def split_frontier(puzzle, size):
+    """
+    Expand the initial state breadth-first until a layer holds at least size states.
+
+    Duplicates are removed, so the layer at depth d holds exactly the states at distance d from the
+    initial state. Every path to the goal that is at least d moves long, in particular every
+    optimal one, passes through that layer, so searching below all of its states is complete.
+
+    Parameters:
+        puzzle (NPuzzle): The puzzle to solve.
+        size (int): The minimum number of states wanted in the layer.
+
+    Returns:
+        tuple: (layer, expanded, solution) where layer is a list of (state, blank, depth, previous
+               blank, moves) tuples, expanded the number of expansions, and solution the moves of a
+               shortest solution if the goal was reached before the layer grew large enough, else None.
+    """
+    layer = [(puzzle.start, puzzle.start.index(0), 0, -1, ())]
+    seen = {puzzle.start}
+    expanded = 0
+    while len(layer) < size:
+        next_layer = []
+        for state, blank, depth, _, moves in layer:
+            if state == puzzle.goal:
+                return layer, expanded, list(moves)
+            expanded += 1
+            for child, child_blank, move in puzzle.successors(state, blank):
+                if child not in seen:
+                    seen.add(child)
+                    next_layer.append((child, child_blank, depth + 1, blank, moves + (move,)))
+        if not next_layer:
+            break
+        layer = next_layer
+    for state, _, _, _, moves in layer:
+        if state == puzzle.goal:
+            return layer, expanded, list(moves)
+    return layer, expanded, None
+
+def parallel_ida_star(puzzle, processes=None, tasks_per_process=16, return_path=False, stats=None,
+                      progress=None, progress_every=10000, budget=None):
+    """
+    Solve a single sliding puzzle with IDA* spread over several processes.
+
+    The search tree is split below the root: a short breadth-first search builds a layer of
+    distinct states (see split_frontier), and every IDA* iteration searches the subtrees of those
+    states with the current threshold on f in a process pool, one task per state, sharing the
+    threshold. The next threshold is the smallest f that exceeded the current one over all
+    subtrees. A solution found during the iteration with threshold T costs exactly T, because no
+    path has f below T that was not already searched, so the cost stays optimal; the other
+    workers are told to stop as soon as one solution is known.
+
+    Parameters:
+        puzzle (NPuzzle): The puzzle to solve.
+        processes (int, optional): Number of worker processes; os.cpu_count() by default. A value of
+                                   1 searches the subtrees in the calling process.
+        tasks_per_process (int, optional): Minimum number of subtrees per process, for load balancing.
+        return_path (bool, optional): Also return the moves of the solution.
+        stats (SearchStats, optional): Statistics to fill in; iterations counts IDA* iterations,
+                                       peak_open the size of the split layer, and workers holds one
+                                       entry per process (pid, tasks, nodes_expanded,
+                                       nodes_generated, busy_time).
+        progress (function, optional): Called with stats after each completed subtree, at most
+                                       once per progress_every expansions.
+        progress_every (int, optional): Number of expansions between progress calls.
+        budget (Budget, optional): Limits on the search; max_open bounds the split layer. Each
+                                   subtree gets the expansions left when its iteration starts, so
+                                   subtrees running side by side may overshoot max_expansions
+                                   together; the time limit is checked every few thousand expansions.
+
+    Returns:
+        int or tuple: The optimal cost, or (cost, path) with return_path, as returned by
+                      NPuzzle.solve; -1 if the puzzle is unsolvable.
+
+    Raises:
+        BudgetExceeded: If the budget runs out before the goal is reached.
+    """
+    processes = processes or os.cpu_count() or 1
+    layer, expanded, solution = split_frontier(puzzle, processes * tasks_per_process)
+    if stats is not None:
+        stats.peak_open = len(layer)
+    if solution is not None:
+        puzzle.nodes_expanded = expanded
+        return (len(solution), [MOVES[move][2] for move in solution]) if return_path else len(solution)
+    if budget is not None and budget.max_open is not None and len(layer) > budget.max_open:
+        puzzle.nodes_expanded = expanded
+        raise BudgetExceeded("max_open", expanded)
+
+    n, heuristic = puzzle.n, puzzle.heuristic
+    nodes = [(state, blank, depth, heuristic(n, state), previous, moves)
+             for state, blank, depth, previous, moves in layer]
+    threshold = min(depth + h for _, _, depth, h, _, _ in nodes)
+    # Wall-clock deadline shared with the workers, which run in other processes
+    deadline = None if budget is None or budget.deadline is None else \
+        time.time() + budget.deadline - time.perf_counter()
+    workers = {}
+    last_progress = 0
+
+    if processes == 1:
+        _init_worker(n, puzzle.goal, heuristic)
+        executor = stop = None
+    else:
+        context = multiprocessing.get_context()
+        stop = context.Event()
+        executor = ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_worker,
+                                       initargs=(n, puzzle.goal, heuristic, stop))
+    try:
+        while True:
+            if stats is not None:
+                stats.iterations += 1
+            tasks = [node for node in nodes if node[2] + node[3] <= threshold]
+            next_threshold = min((depth + h for _, _, depth, h, _, _ in nodes if depth + h > threshold),
+                                 default=math.inf)
+            found = reason = None
+
+            def allowance():
+                if budget is None or budget.max_expansions is None:
+                    return None
+                return max(1, budget.max_expansions - expanded)
+
+            def arguments(node):
+                state, blank, depth, h, previous, _ = node
+                return state, blank, depth, h, previous, threshold, allowance(), deadline
+
+            if executor is None:
+                outcomes = ((node, _search_subtree(*arguments(node))) for node in tasks)
+            else:
+                futures = {executor.submit(_search_subtree, *arguments(node)): node for node in tasks}
+                outcomes = _as_completed(futures)
+
+            for node, outcome in outcomes:
+                expanded += outcome["expanded"]
+                worker = workers.setdefault(outcome["pid"], {"pid": outcome["pid"], "tasks": 0, "nodes_expanded": 0,
+                                                             "nodes_generated": 0, "busy_time": 0.0})
+                worker["tasks"] += 1
+                worker["nodes_expanded"] += outcome["expanded"]
+                worker["nodes_generated"] += outcome["generated"]
+                worker["busy_time"] += outcome["time"]
+                if stats is not None:
+                    stats.nodes_generated += outcome["generated"]
+                    if progress is not None and expanded - last_progress >= progress_every:
+                        last_progress = expanded
+                        stats.nodes_expanded = expanded
+                        stats.workers = list(workers.values())
+                        progress(stats)
+                if outcome["cost"] is not None:
+                    found = (node, outcome)
+                elif outcome["stopped"] is not None:
+                    reason = outcome["stopped"]
+                elif budget is not None:
+                    reason = budget.exceeded(expanded, 0)
+                if found is not None or reason is not None:
+                    # Running subtrees give up at their next check; queued ones are cancelled
+                    if stop is not None:
+                        stop.set()
+                    break
+                if outcome["next"] < next_threshold:
+                    next_threshold = outcome["next"]
+
+            if found is not None:
+                node, outcome = found
+                puzzle.nodes_expanded = expanded
+                if not return_path:
+                    return outcome["cost"]
+                path = [MOVES[move][2] for move in node[5] + tuple(outcome["moves"])]
+                return outcome["cost"], path
+            if reason is not None:
+                puzzle.nodes_expanded = expanded
+                raise BudgetExceeded(reason, expanded)
+            if next_threshold == math.inf:
+                puzzle.nodes_expanded = expanded
+                return (-1, None) if return_path else -1
+            threshold = next_threshold
+    finally:
+        if stats is not None:
+            stats.workers = sorted(workers.values(), key=lambda worker: worker["pid"])
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+def _as_completed(futures):
+    """
+    Yield (node, outcome) for each finished task as soon as it completes.
+
+    Parameters:
+        futures (dict): Maps each future to the frontier node it searches.
+
+    Yields:
+        tuple: The frontier node and the outcome returned by _search_subtree.
+    """
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield futures[future], future.result()
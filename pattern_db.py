@@ -0,0 +1,210 @@
+import mmap
+import os
+from functools import lru_cache
+
+from utils import data_dir
+
+MAGIC = b"NPDB"
+VERSION = 1
+UNSEEN = 255  # Table entry for abstract states that are unreachable or not yet reached
+
+# Number of tiles per pattern for each board size, chosen to keep every table near or below 1 MB
+GROUP_SIZES = {2: 3, 3: 4, 4: 5, 5: 4, 6: 3}
+
+def default_partition(n):
+    """
+    Split the tiles of an n x n board into disjoint groups of consecutive tiles.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+
+    Returns:
+        tuple of tuples: The tile groups, e.g. ((1, 2, 3, 4, 5), (6, ..., 10), (11, ..., 15)) for n = 4.
+    """
+    size = GROUP_SIZES.get(n, 3)
+    tiles = list(range(1, n * n))
+    return tuple(tuple(tiles[i:i + size]) for i in range(0, len(tiles), size))
+
+def pdb_path(n, tiles, directory=None):
+    """
+    Return the path of the file storing the pattern database of a tile group.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+        tiles (tuple of int): The tiles of the pattern.
+        directory (str, optional): The directory holding the tables, utils.data_dir() by default.
+
+    Returns:
+        str: The path of the pattern database file.
+    """
+    name = f"pdb-{n}-{'-'.join(map(str, tiles))}.bin"
+    return os.path.join(directory or data_dir(), name)
+
+def build_pdb(n, tiles, vectorize=None):
+    """
+    Build the pattern database of a tile group by backward breadth-first search from the goal.
+
+    An abstract state is the tuple of positions of the pattern tiles; every other tile, including
+    the blank, is indistinguishable. A pattern tile may slide into any adjacent cell not occupied by
+    another pattern tile, and each such move costs 1. Only moves of pattern tiles are counted, so
+    the tables of disjoint groups can be added and the sum is still admissible.
+
+    An abstract state with positions (p0, ..., pk-1) is stored at index sum(p_i * N**(k-1-i)),
+    where N = n*n, one byte per index. Indices that repeat a position are never reached.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+        tiles (tuple of int): The tiles of the pattern.
+        vectorize (bool, optional): Expand each layer as one NumPy array (see vectorized.build_pdb),
+                                    several times faster. By default NumPy is used when it is installed.
+
+    Returns:
+        bytearray: The distance of every abstract state, UNSEEN for unreachable indices.
+
+    Raises:
+        ImportError: If vectorize is True and NumPy is not installed.
+        ValueError: If a distance does not fit in a byte.
+    """
+    if vectorize is not False:
+        # Imported here: vectorized imports this module
+        import vectorized
+        if vectorize or vectorized.available():
+            return vectorized.build_pdb(n, tiles)
+    size = n * n
+    k = len(tiles)
+    weights = [size ** (k - 1 - i) for i in range(k)]
+    # Cells adjacent to each position
+    adjacent = []
+    for pos in range(size):
+        i, j = divmod(pos, n)
+        adjacent.append([ni * n + nj for ni, nj in ((i, j + 1), (i, j - 1), (i + 1, j), (i - 1, j))
+                         if 0 <= ni < n and 0 <= nj < n])
+
+    table = bytearray([UNSEEN]) * (size ** k)
+    start = sum((tile - 1) * weight for tile, weight in zip(tiles, weights))
+    table[start] = 0
+
+    layer = [start]
+    depth = 0
+    # Breadth-first search, one layer of equal distance at a time
+    while layer:
+        depth += 1
+        if depth >= UNSEEN:
+            raise ValueError(f"Pattern {tiles} is too deep to be stored one byte per state.")
+        next_layer = []
+        for index in layer:
+            # Decode the positions of the pattern tiles
+            positions = []
+            rest = index
+            for weight in weights:
+                pos, rest = divmod(rest, weight)
+                positions.append(pos)
+            for weight, pos in zip(weights, positions):
+                for target in adjacent[pos]:
+                    if target in positions:
+                        continue
+                    child = index + (target - pos) * weight
+                    if table[child] == UNSEEN:
+                        table[child] = depth
+                        next_layer.append(child)
+        layer = next_layer
+    return table
+
+def save_pdb(path, n, tiles, table):
+    """
+    Write a pattern database to disk atomically.
+
+    The file holds a header (magic, version, n, number of tiles, the tiles) followed by the table,
+    one byte per abstract state. It is written to a temporary file and renamed into place, so
+    concurrent solver processes never observe a partial table.
+
+    Parameters:
+        path (str): The destination path.
+        n (int): The dimension of the puzzle (n x n).
+        tiles (tuple of int): The tiles of the pattern.
+        table (bytearray): The table returned by build_pdb.
+    """
+    header = MAGIC + bytes([VERSION, n, len(tiles)]) + bytes(tiles)
+    # Imported here: only needed when a database is built, not on every start-up
+    import tempfile
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(header)
+            file.write(table)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def load_pdb(path, n, tiles):
+    """
+    Memory-map a pattern database file, so processes loading the same file share its pages.
+
+    Parameters:
+        path (str): The path of the pattern database file.
+        n (int): The expected dimension of the puzzle.
+        tiles (tuple of int): The expected tiles of the pattern.
+
+    Returns:
+        memoryview: A read-only view of the table, indexed like the result of build_pdb.
+
+    Raises:
+        ValueError: If the file does not hold the table of the given pattern.
+    """
+    header = MAGIC + bytes([VERSION, n, len(tiles)]) + bytes(tiles)
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    if view[:len(header)] != header or len(view) != len(header) + (n * n) ** len(tiles):
+        raise ValueError(f"{path} is not a pattern database for tiles {tiles} on a {n}x{n} board.")
+    return view[len(header):]
+
+@lru_cache(maxsize=None)
+def pattern_databases(n, partition=None, directory=None):
+    """
+    Load the additive pattern databases of a board size, building and saving missing tables once.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+        partition (tuple of tuples, optional): Disjoint tile groups, default_partition(n) by default.
+        directory (str, optional): The directory holding the tables, utils.data_dir() by default.
+
+    Returns:
+        list of tuples: (tiles, weights, table) for every group, where weights are the index
+                        multipliers of the group's tile positions.
+    """
+    databases = []
+    for tiles in partition or default_partition(n):
+        path = pdb_path(n, tiles, directory)
+        if not os.path.exists(path):
+            save_pdb(path, n, tiles, build_pdb(n, tiles))
+        weights = [(n * n) ** (len(tiles) - 1 - i) for i in range(len(tiles))]
+        databases.append((tiles, weights, load_pdb(path, n, tiles)))
+    return databases
+
+def pattern_database(n, state):
+    """
+    Calculate the additive pattern database heuristic for a sliding puzzle.
+
+    The positions of the tiles are looked up once, then the heuristic is the sum over the tile
+    groups of default_partition(n) of the stored distance of the group's abstract state.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+        state (bytes or sequence of int): The flat, row-major encoding of the puzzle state (see
+                                          utils.encode_state), where 0 represents the blank.
+
+    Returns:
+        int: The pattern database estimate of the number of moves to the goal.
+    """
+    positions = [0] * (n * n)
+    for pos, tile in enumerate(state):
+        positions[tile] = pos
+    distance = 0
+    for tiles, weights, table in pattern_databases(n):
+        index = 0
+        for tile, weight in zip(tiles, weights):
+            index += positions[tile] * weight
+        distance += table[index]
+    return distance
@@ -0,0 +1,68 @@
+import json
+
+class SearchStats:
+    """
+    Counters and timings collected by a search when statistics are requested.
+
+    Attributes:
+        nodes_expanded (int): Nodes whose successors were generated.
+        nodes_generated (int): Successors produced by the expansions.
+        duplicates_skipped (int): Successors discarded because their state was already reached at
+                                  least as cheaply, plus stale open-list entries skipped when popped.
+        peak_open (int): Largest size of the open list (for depth-first engines, the deepest stack).
+        peak_closed (int): Largest number of states remembered for duplicate detection.
+        iterations (int): Iterations of iterative engines such as IDA* (0 for A*).
+        heuristic_time (float): Seconds spent evaluating the heuristic.
+        successor_time (float): Seconds spent generating successors.
+        elapsed (float): Wall-clock seconds of the whole search.
+        workers (list of dict): Per-process counters of multi-process engines, empty otherwise.
+    """
+
+    FIELDS = ("nodes_expanded", "nodes_generated", "duplicates_skipped", "peak_open", "peak_closed",
+              "iterations", "heuristic_time", "successor_time", "elapsed", "workers")
+
+    def __init__(self):
+        """
+        Initialize every counter and timing to zero.
+        """
+        self.nodes_expanded = 0
+        self.nodes_generated = 0
+        self.duplicates_skipped = 0
+        self.peak_open = 0
+        self.peak_closed = 0
+        self.iterations = 0
+        self.heuristic_time = 0.0
+        self.successor_time = 0.0
+        self.elapsed = 0.0
+        self.workers = []
+
+    @property
+    def nodes_per_second(self):
+        """
+        float: Expansions per wall-clock second, 0 if nothing was timed.
+        """
+        return self.nodes_expanded / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self):
+        """
+        Return the statistics as a plain dictionary, including nodes_per_second.
+
+        Returns:
+            dict: Field name to value.
+        """
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        data["nodes_per_second"] = self.nodes_per_second
+        return data
+
+    def to_json(self):
+        """
+        Return the statistics as a JSON string.
+
+        Returns:
+            str: The JSON encoding of to_dict().
+        """
+        return json.dumps(self.to_dict())
+
+    def __repr__(self):
+        fields = ", ".join(f"{key}={value!r}" for key, value in self.to_dict().items())
+        return f"SearchStats({fields})"
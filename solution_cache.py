@@ -0,0 +1,206 @@
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from utils import MOVES, data_dir
+
+# One-letter codes of the moves in MOVES, used to store paths compactly
+MOVE_CODES = "RLDU"
+
+@lru_cache(maxsize=None)
+def transpose_tables(n):
+    """
+    Precompute the transpose symmetry of the standard goal layout for an n x n board.
+
+    Reflecting a board across its main diagonal maps the goal onto itself once every tile is
+    relabeled with the tile whose goal position is the reflected one; the blank stays the blank.
+    Both boards then need the same number of moves, with Right/Down and Left/Up exchanged.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+
+    Returns:
+        tuple: (positions, relabel, moves) where positions[pos] is the reflected flat index,
+               relabel is a bytes.translate table mapping each tile to its reflected tile, and
+               moves maps each move code to its reflected move code.
+    """
+    positions = [(pos % n) * n + pos // n for pos in range(n * n)]
+    relabel = bytearray(range(256))
+    for tile in range(1, n * n):
+        relabel[tile] = positions[tile - 1] + 1
+    reflected = {}
+    for (di, dj, _), code in zip(MOVES, MOVE_CODES):
+        reflected[code] = next(other for (oi, oj, _), other in zip(MOVES, MOVE_CODES) if (oi, oj) == (dj, di))
+    return positions, bytes(relabel), reflected
+
+def canonicalize(state, n):
+    """
+    Return the canonical representative of a state under the transpose symmetry.
+
+    Parameters:
+        state (bytes): The flat encoding of the state.
+        n (int): The dimension of the puzzle (n x n).
+
+    Returns:
+        tuple: (canonical state, transposed), where transposed tells whether the canonical state
+               is the reflection of the given one.
+    """
+    positions, relabel, _ = transpose_tables(n)
+    reflected = bytearray(len(state))
+    for pos, tile in enumerate(state.translate(relabel)):
+        reflected[positions[pos]] = tile
+    reflected = bytes(reflected)
+    return (reflected, True) if reflected < state else (state, False)
+
+def reflect_path(codes, n):
+    """
+    Map a path of move codes through the transpose symmetry.
+
+    Parameters:
+        codes (str): Move codes ("R", "L", "D", "U").
+        n (int): The dimension of the puzzle (n x n).
+
+    Returns:
+        str: The reflected move codes.
+    """
+    moves = transpose_tables(n)[2]
+    return "".join(moves[code] for code in codes)
+
+class SolutionCache:
+    """
+    Persistent cache of solved puzzles, keyed by the canonical board.
+
+    Boards and their mirror images across the main diagonal share one entry (see canonicalize).
+    Entries live in a SQLite database in WAL mode, so several solver processes can read and write
+    the same file concurrently, with a bounded in-memory LRU in front of it. When the live pages of
+    the database exceed max_bytes, the least recently accessed entries are evicted.
+
+    Attributes:
+        path (str): The path of the SQLite database.
+        memory_size (int): Maximum number of entries kept in memory.
+        max_bytes (int): Maximum size of the live data on disk.
+    """
+
+    def __init__(self, path=None, memory_size=4096, max_bytes=64 * 1024 * 1024):
+        """
+        Open (or create) a solution cache.
+
+        Parameters:
+            path (str, optional): The database path, solutions.sqlite in utils.data_dir() by default.
+            memory_size (int, optional): Maximum number of entries kept in the in-memory LRU.
+            max_bytes (int, optional): Size of the on-disk data above which old entries are evicted.
+        """
+        self.path = path or os.path.join(data_dir(), "solutions.sqlite")
+        self.memory_size = memory_size
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        # Wait for other processes' write locks instead of failing immediately
+        self.connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS solutions ("
+            "key BLOB PRIMARY KEY, cost INTEGER NOT NULL, path TEXT, accessed REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS solutions_accessed ON solutions (accessed)")
+
+    def _remember(self, key, entry):
+        """
+        Store an entry in the in-memory LRU, evicting the least recently used one when full.
+        """
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def get(self, state, n, need_path=False):
+        """
+        Look up the solution of a state.
+
+        Parameters:
+            state (bytes): The flat encoding of the state.
+            n (int): The dimension of the puzzle (n x n).
+            need_path (bool, optional): Only report a hit if the entry holds the moves as well.
+
+        Returns:
+            tuple or None: (cost, path) where path is a list of move descriptions, or None if the
+                           entry has no path; None on a miss.
+        """
+        key, transposed = canonicalize(state, n)
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.memory.move_to_end(key)
+        else:
+            row = self.connection.execute("SELECT cost, path FROM solutions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            entry = (row[0], row[1])
+            self._remember(key, entry)
+            self.connection.execute("UPDATE solutions SET accessed = ? WHERE key = ?", (time.time(), key))
+        cost, codes = entry
+        if codes is None:
+            return None if need_path else (cost, None)
+        if transposed:
+            codes = reflect_path(codes, n)
+        labels = {code: label for (_, _, label), code in zip(MOVES, MOVE_CODES)}
+        return cost, [labels[code] for code in codes]
+
+    def put(self, state, n, cost, path=None):
+        """
+        Store the solution of a state, keeping a previously stored path if none is given.
+
+        Parameters:
+            state (bytes): The flat encoding of the state.
+            n (int): The dimension of the puzzle (n x n).
+            cost (int): The optimal number of moves.
+            path (list of str, optional): The move descriptions of an optimal solution.
+        """
+        key, transposed = canonicalize(state, n)
+        codes = None
+        if path is not None:
+            codes = "".join(MOVE_CODES[[label for _, _, label in MOVES].index(label)] for label in path)
+            if transposed:
+                codes = reflect_path(codes, n)
+        self.connection.execute(
+            "INSERT INTO solutions (key, cost, path, accessed) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET cost = excluded.cost, "
+            "path = COALESCE(excluded.path, solutions.path), accessed = excluded.accessed",
+            (key, cost, codes, time.time()),
+        )
+        previous = self.memory.get(key)
+        self._remember(key, (cost, codes if codes is not None or previous is None else previous[1]))
+        self._evict()
+
+    def _evict(self):
+        """
+        Delete the least recently accessed entries while the live data exceeds max_bytes.
+        """
+        def live_bytes():
+            page_size = self.connection.execute("PRAGMA page_size").fetchone()[0]
+            pages = self.connection.execute("PRAGMA page_count").fetchone()[0]
+            free = self.connection.execute("PRAGMA freelist_count").fetchone()[0]
+            return (pages - free) * page_size
+
+        while live_bytes() > self.max_bytes:
+            # Drop the oldest tenth of the entries at a time
+            count = self.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+            if not count:
+                break
+            self.connection.execute(
+                "DELETE FROM solutions WHERE key IN (SELECT key FROM solutions ORDER BY accessed LIMIT ?)",
+                (max(1, count // 10),),
+            )
+            self.memory.clear()
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
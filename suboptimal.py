@@ -0,0 +1,197 @@
+import heapq
+import math
+import time
+
+from budget import BudgetExceeded
+from heuristics import DELTA_TABLES
+
+def best_first_search(puzzle, weight=None, anytime=False, return_path=False, stats=None, progress=None,
+                      progress_every=10000, budget=None):
+    """
+    Best-first search ordered by g + weight * h, or by h alone when weight is None.
+
+    With weight 1 this is A*; larger weights trust the heuristic more and find a solution after
+    far fewer expansions, at most weight times longer than optimal for an admissible heuristic.
+    Greedy best-first search ignores g and gives no a priori bound.
+
+    In anytime mode the search does not stop at the first solution (Anytime Weighted A*, Hansen
+    and Zhou, 2007): the best solution found so far is kept as the incumbent, nodes whose g + h
+    cannot beat it are pruned, and the search continues until the open list is empty, which proves
+    the incumbent optimal, or until the budget is exhausted.
+
+    The suboptimality factor of the returned solution is stored in puzzle.suboptimality: its cost
+    divided by a proven lower bound on the optimal cost, the largest of h(start) and the smallest
+    g + h left on the open list (capped at weight for weighted A*). It is 1.0 once optimality is
+    proven.
+
+    Parameters:
+        puzzle (NPuzzle): The puzzle to solve.
+        weight (float, optional): The weight of the heuristic; None for greedy best-first search.
+        anytime (bool, optional): Keep improving the solution until the search space or the budget
+                                  is exhausted.
+        return_path (bool, optional): Also return the moves of the solution.
+        stats (SearchStats, optional): Statistics to fill in, or None to collect nothing.
+        progress (function, optional): Called with stats every progress_every expansions.
+        progress_every (int, optional): Number of expansions between progress calls.
+        budget (Budget, optional): Limits on the search.
+
+    Returns:
+        int or tuple: The cost of the solution found, or (cost, path) with return_path, as returned
+                      by NPuzzle.solve; -1 if the puzzle is unsolvable.
+
+    Raises:
+        BudgetExceeded: If the budget runs out before any solution is found.
+    """
+    n = puzzle.n
+    delta_table = DELTA_TABLES.get(puzzle.heuristic)
+    delta = delta_table(n) if delta_table is not None else None
+
+    def priority(g, h):
+        return h if weight is None else g + weight * h
+
+    initial_h = puzzle.heuristic(n, puzzle.start)
+    # Each entry is (priority, g, state, blank, h)
+    frontier = [(priority(0, initial_h), 0, puzzle.start, puzzle.start.index(0), initial_h)]
+    best_g = {puzzle.start: 0}
+    parents = {} if return_path else None
+    incumbent = math.inf  # Cost of the best solution found so far
+    incumbent_path = None
+    expanded = 0
+    clock = time.perf_counter
+
+    def lower_bound():
+        # Some state of an optimal path is always waiting on the open list with its optimal g
+        bound = min((g + h for _, g, _, _, h in frontier), default=incumbent)
+        return max(initial_h, min(bound, incumbent))
+
+    def finish(result):
+        puzzle.nodes_expanded = expanded
+        if stats is not None:
+            stats.peak_closed = len(best_g)
+        return result
+
+    while frontier:
+        if budget is not None:
+            reason = budget.exceeded(expanded, len(frontier))
+            if reason is not None:
+                if incumbent == math.inf:
+                    finish(None)
+                    raise BudgetExceeded(reason, expanded)
+                break
+
+        _, cost, state, blank, h = heapq.heappop(frontier)
+        # Skip stale entries and, once a solution is known, nodes that cannot improve on it
+        if cost > best_g[state] or cost + h >= incumbent:
+            if stats is not None:
+                stats.duplicates_skipped += 1
+            continue
+
+        if state == puzzle.goal:
+            incumbent = cost
+            if return_path:
+                # Parents may still change, so the path is fixed when the solution is found
+                incumbent_path = puzzle.reconstruct_path(parents, state)
+            if not anytime:
+                break
+            continue
+
+        expanded += 1
+        new_cost = cost + 1
+        if stats is None:
+            children = puzzle.successors(state, blank)
+        else:
+            started = clock()
+            children = puzzle.successors(state, blank)
+            stats.successor_time += clock() - started
+            stats.nodes_generated += len(children)
+            if len(frontier) > stats.peak_open:
+                stats.peak_open = len(frontier)
+            if progress is not None and expanded % progress_every == 0:
+                stats.nodes_expanded = expanded
+                stats.peak_closed = len(best_g)
+                progress(stats)
+
+        for child, child_blank, move in children:
+            if new_cost >= best_g.get(child, new_cost + 1):
+                if stats is not None:
+                    stats.duplicates_skipped += 1
+                continue
+            if stats is not None:
+                started = clock()
+            if delta is not None:
+                child_h = h + delta[state[child_blank]][child_blank][move]
+            else:
+                child_h = puzzle.heuristic(n, child)
+            if stats is not None:
+                stats.heuristic_time += clock() - started
+            if new_cost + child_h >= incumbent:
+                continue
+            best_g[child] = new_cost
+            if parents is not None:
+                parents[child] = move
+            heapq.heappush(frontier, (priority(new_cost, child_h), new_cost, child, child_blank, child_h))
+
+    if incumbent == math.inf:
+        puzzle.suboptimality = 1.0
+        return finish((-1, None) if return_path else -1)
+
+    bound = lower_bound()
+    factor = incumbent / bound if bound > 0 else 1.0
+    if weight is not None and not anytime:
+        factor = min(factor, weight)
+    puzzle.suboptimality = max(1.0, factor)
+    return finish((incumbent, incumbent_path) if return_path else incumbent)
+
+def weighted_astar(puzzle, weight=2.0, **options):
+    """
+    Solve a sliding puzzle with weighted A*, whose solution is at most weight times optimal.
+
+    Parameters:
+        puzzle (NPuzzle): The puzzle to solve.
+        weight (float, optional): The weight of the heuristic, at least 1; 2.0 by default.
+        **options: return_path, stats, progress, progress_every and budget, as for best_first_search.
+
+    Returns:
+        int or tuple: As returned by best_first_search.
+
+    Raises:
+        ValueError: If weight is smaller than 1.
+    """
+    if weight < 1:
+        raise ValueError("The weight of weighted A* must be at least 1.")
+    return best_first_search(puzzle, weight=weight, **options)
+
+def greedy_best_first(puzzle, **options):
+    """
+    Solve a sliding puzzle with greedy best-first search, ordered by the heuristic alone.
+
+    Parameters:
+        puzzle (NPuzzle): The puzzle to solve.
+        **options: return_path, stats, progress, progress_every and budget, as for best_first_search.
+
+    Returns:
+        int or tuple: As returned by best_first_search.
+    """
+    return best_first_search(puzzle, weight=None, **options)
+
+def anytime_astar(puzzle, weight=2.0, **options):
+    """
+    Solve a sliding puzzle with Anytime Weighted A*, improving the solution until the budget expires.
+
+    Without a budget the search runs until the incumbent is proven optimal.
+
+    Parameters:
+        puzzle (NPuzzle): The puzzle to solve.
+        weight (float, optional): The weight used to find the first solution quickly; 2.0 by default.
+        **options: return_path, stats, progress, progress_every and budget, as for best_first_search.
+
+    Returns:
+        int or tuple: As returned by best_first_search.
+
+    Raises:
+        ValueError: If weight is smaller than 1.
+        BudgetExceeded: If the budget runs out before the first solution is found.
+    """
+    if weight < 1:
+        raise ValueError("The weight of anytime A* must be at least 1.")
+    return best_first_search(puzzle, weight=weight, anytime=True, **options)
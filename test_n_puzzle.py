@@ -1,8 +1,40 @@
 import unittest
 import tempfile
 import os
-from utils import generate_goal_state, find_blank, read_puzzle
+import io
+import json
+import contextlib
+from utils import generate_goal_state, find_blank, read_puzzle, encode_state, decode_state, count_inversions, is_solvable, iter_puzzles, parse_rows
+import main
 from n_puzzle import NPuzzle
+from budget import BudgetExceeded
+from external import pack, unpack
+import vectorized
+import batch
+from batch import solve_many
+from benchmark import generate_instances, from_korf, load_korf, run_benchmark, compare
+from search_stats import SearchStats
+import distance_table
+from distance_table import load_table, rank, SIZE
+from solution_cache import SolutionCache, canonicalize
+from open_list import HeapOpenList, BucketOpenList
+from heuristics import manhattan, euclidean, manhattan_delta, euclidean_delta, linear_conflict, walking_distance, HEURISTICS, UnsupportedHeuristic
+from pattern_db import build_pdb, save_pdb, load_pdb, pdb_path, pattern_databases, pattern_database
+
+def setUpModule():
+    """
+    Keep precomputed tables written by the tests out of the shared data directory, so tables 
+    built locally never change which engine answers a test.
+    """
+    global _previous_data_dir
+    _previous_data_dir = os.environ.get("NPUZZLE_DATA_DIR")
+    os.environ["NPUZZLE_DATA_DIR"] = tempfile.mkdtemp()
+
+def tearDownModule():
+    if _previous_data_dir is None:
+        del os.environ["NPUZZLE_DATA_DIR"]
+    else:
+        os.environ["NPUZZLE_DATA_DIR"] = _previous_data_dir
 
 class TestUtils(unittest.TestCase):
     def test_generate_goal_state(self):
@@ -52,6 +84,210 @@ class TestUtils(unittest.TestCase):
         finally:
             os.remove(tmp_file_path)
 
+    def test_encode_decode_state(self):
+        """
+        Test that encode_state flattens a puzzle row by row and decode_state restores it.
+        """
+        state = (
+            (1, 2, 3),
+            (4, 0, 6),
+            (7, 8, 5)
+        )
+        encoded = encode_state(state)
+        self.assertEqual(encoded, bytes([1, 2, 3, 4, 0, 6, 7, 8, 5]))
+        self.assertEqual(decode_state(encoded, 3), state)
+
+    def test_count_inversions(self):
+        """
+        Test that count_inversions counts every out-of-order pair.
+        """
+        self.assertEqual(count_inversions([1, 2, 3, 4]), 0)
+        self.assertEqual(count_inversions([4, 3, 2, 1]), 6)
+        self.assertEqual(count_inversions([3, 1, 2, 5, 4]), 3)
+
+    def test_is_solvable(self):
+        """
+        Test solvability on odd and even boards: swapping two tiles of a solvable board makes it 
+        unsolvable, while moving the blank keeps it solvable.
+        """
+        for n in (3, 4):
+            goal = [list(row) for row in generate_goal_state(n)]
+            self.assertTrue(is_solvable(goal))
+            swapped = [list(row) for row in goal]
+            swapped[0][0], swapped[0][1] = swapped[0][1], swapped[0][0]
+            self.assertFalse(is_solvable(swapped))
+            moved = [list(row) for row in goal]
+            moved[n - 1][n - 1], moved[n - 2][n - 1] = moved[n - 2][n - 1], moved[n - 1][n - 1]
+            self.assertTrue(is_solvable(moved))
+
+    def test_read_puzzle_rejects_duplicate_tiles(self):
+        """
+        Test that read_puzzle rejects a file whose tiles are not a permutation.
+        """
+        with tempfile.NamedTemporaryFile(mode="w+", delete=False) as tmp_file:
+            tmp_file.write("1 2 3\n4 5 6\n7 7 0\n")
+            tmp_file_path = tmp_file.name
+        try:
+            with self.assertRaises(ValueError):
+                read_puzzle(tmp_file_path)
+        finally:
+            os.remove(tmp_file_path)
+
+    def test_iter_puzzles(self):
+        """
+        Test that iter_puzzles reads blank-line separated text puzzles and JSON lines from one stream.
+        """
+        stream = io.StringIO(
+            "1 2 3\n4 5 6\n7 8 0\n\n"
+            "[[1, 2], [0, 3]]\n"
+            '{"state": [[1, 2], [3, 0]]}\n'
+            "8 1 3\n4 _ 2\n7 6 5\n"
+        )
+        puzzles = list(iter_puzzles(stream))
+        self.assertEqual(puzzles, [
+            [[1, 2, 3], [4, 5, 6], [7, 8, 0]],
+            [[1, 2], [0, 3]],
+            [[1, 2], [3, 0]],
+            [[8, 1, 3], [4, 0, 2], [7, 6, 5]],
+        ])
+
+    def test_iter_puzzles_malformed_json(self):
+        """
+        Test that a JSON line that is not a board raises ValueError naming its line.
+        """
+        for line in ('{"foo": 1}', "[1, 2]", '{"state": 5}', "[[1, 2], [0, 3]"):
+            stream = io.StringIO("[[1, 2], [0, 3]]\n" + line + "\n")
+            puzzles = iter_puzzles(stream)
+            self.assertEqual(next(puzzles), [[1, 2], [0, 3]])
+            with self.assertRaisesRegex(ValueError, "^Line 2: "):
+                next(puzzles)
+
+    def test_parse_fixed_width_blank(self):
+        """
+        Test that an empty cell of a fixed-width layout is located by column alignment rather than 
+        assumed to be at the start of its row.
+        """
+        lines = ["  1   2   3   5  10", "  6   7   4      15", " 11  12   9   8  20",
+                 " 16  17  13  14  23", " 21  22  18  24  19"]
+        self.assertEqual(parse_rows(lines)[1], [6, 7, 4, 0, 15])
+        self.assertEqual(parse_rows(["1\t2\t3", "\t4\t5", "7\t8\t6"]), [[1, 2, 3], [0, 4, 5], [7, 8, 6]])
+        with self.assertRaises(ValueError):
+            parse_rows(["1 2 3", "4 5 6 9", "7 8 0"])
+
+
+class TestCommandLine(unittest.TestCase):
+    def run_main(self, argv, stdin=""):
+        """
+        Run main.main with argv and stdin, returning its exit status and printed lines.
+        """
+        output = io.StringIO()
+        original = main.sys.stdin
+        main.sys.stdin = io.StringIO(stdin)
+        try:
+            with contextlib.redirect_stdout(output):
+                status = main.main(argv)
+        finally:
+            main.sys.stdin = original
+        return status, output.getvalue().splitlines()
+
+    def test_json_lines_from_stdin(self):
+        """
+        Test that every puzzle of stdin gets one JSON result, in order, with the requested path.
+        """
+        stdin = "1 2 3\n4 5 6\n7 0 8\n\n[[1, 2, 3], [4, 5, 6], [8, 7, 0]]\n"
+        status, lines = self.run_main(["l", "ida", "-f", "-", "--format", "json", "--path"], stdin)
+        results = [json.loads(line) for line in lines]
+        self.assertEqual(status, 0)
+        self.assertEqual([(result["index"], result["cost"]) for result in results], [(0, 1), (1, -1)])
+        self.assertEqual(results[0]["path"], ["Right"])
+
+    def test_text_output_and_errors(self):
+        """
+        Test that the text format reports solutions only, and that invalid puzzles set the exit status.
+        """
+        status, lines = self.run_main(["-f", "-"], "1 2 3\n4 5 6\n7 0 8\n")
+        self.assertEqual((status, lines), (0, ["Solution found in 1 moves"]))
+        status, lines = self.run_main(["-f", "-"], "1 2 3\n4 5 6\n7 7 0\n")
+        self.assertEqual(status, 1)
+        self.assertTrue(lines[0].startswith("Invalid puzzle configuration"))
+
+    def test_flags_before_positionals(self):
+        """
+        Test that --path and --stats do not take the heuristic or mode after them as a file name, 
+        and that --path-file writes the moves to a file.
+        """
+        status, lines = self.run_main(["--path", "--stats", "e", "ida", "-f", "-", "--format", "json"],
+                                      "1 2 3\n4 5 6\n7 0 8\n")
+        result = json.loads(lines[0])
+        self.assertEqual(status, 0)
+        self.assertEqual((result["path"], result["stats"]["nodes_expanded"]), (["Right"], result["nodes_expanded"]))
+        with tempfile.TemporaryDirectory() as directory:
+            moves = os.path.join(directory, "moves.txt")
+            status, lines = self.run_main(["--path-file", moves, "m", "-f", "-"], "1 2 3\n4 5 6\n7 0 8\n")
+            with open(moves) as file:
+                self.assertEqual(file.read(), "Right\n\n")
+        self.assertEqual(lines, ["Solution found in 1 moves", f"Moves written to {moves}"])
+
+    def test_puzzle_size_limits(self):
+        """
+        Test that the command line rejects boards outside 3x3..6x6, like read_puzzle, and keeps 
+        solving the rest of the stream, and that a heuristic too small for a board is blamed itself.
+        """
+        big = "\n".join(" ".join(str(7 * row + column + 1) for column in range(7)) for row in range(7))
+        big = big[:big.rindex(" ")] + " 0\n"
+        stdin = big + "\n1 2\n3 0\n\n1 2 3\n4 5 6\n7 0 8\n"
+        status, lines = self.run_main(["-f", "-", "--format", "json"], stdin)
+        results = [json.loads(line) for line in lines]
+        self.assertEqual(status, 1)
+        self.assertIn("Invalid puzzle size: 7x7", results[0]["error"])
+        self.assertIn("Invalid puzzle size: 2x2", results[1]["error"])
+        self.assertEqual(results[2]["cost"], 1)
+        board = "\n".join(" ".join(str(5 * row + column + 1) for column in range(5)) for row in range(5))
+        status, lines = self.run_main(["w", "-f", "-"], board[:board.rindex(" ")] + " 0\n")
+        self.assertEqual(status, 1)
+        self.assertTrue(lines[0].startswith("Unsupported heuristic: The Walking Distance heuristic"))
+
+    def test_unwritable_output_file(self):
+        """
+        Test that an output file that cannot be created is reported with exit status 1 and that the 
+        puzzle file opened before it is closed.
+        """
+        directory = tempfile.mkdtemp()
+        puzzles = os.path.join(directory, "puzzles.txt")
+        with open(puzzles, "w") as file:
+            file.write("1 2 3\n4 5 6\n7 0 8\n")
+        missing = os.path.join(directory, "missing", "out.txt")
+        # Shadow the builtin in main to keep the files it opens
+        opened = []
+        def tracking_open(*args, **kwargs):
+            opened.append(open(*args, **kwargs))
+            return opened[-1]
+        main.open = tracking_open
+        try:
+            for option in ("--path-file", "--stats-file"):
+                errors = io.StringIO()
+                with contextlib.redirect_stderr(errors):
+                    status, lines = self.run_main(["-f", puzzles, option, missing])
+                self.assertEqual((status, lines), (1, []))
+                self.assertTrue(errors.getvalue().startswith("Error writing output file:"))
+        finally:
+            del main.open
+        self.assertEqual(len(opened), 2)
+        self.assertTrue(all(file.closed for file in opened))
+
+    def test_missing_numpy_is_reported(self):
+        """
+        Test that the vectorized mode without NumPy is reported per puzzle instead of crashing.
+        """
+        numpy = vectorized.np
+        vectorized.np = None
+        try:
+            status, lines = self.run_main(["m", "vectorized", "-f", "-"], "1 2 3\n4 5 6\n7 0 8\n")
+        finally:
+            vectorized.np = numpy
+        self.assertEqual(status, 1)
+        self.assertTrue(lines[0].startswith("Mode unavailable: The vectorized engine and table builders require NumPy"))
+
 
 class TestNPuzzleSolver(unittest.TestCase):
     def test_invalid_npuzzle(self):
@@ -68,6 +304,18 @@ class TestNPuzzleSolver(unittest.TestCase):
         with self.assertRaises(ValueError):
             NPuzzle(invalid_state, heuristic="m")
 
+    def test_unsolvable_rejected_up_front(self):
+        """
+        Test that an unsolvable 4x4 puzzle is reported immediately instead of exhausting the search.
+        """
+        state = [list(row) for row in generate_goal_state(4)]
+        state[3][1], state[3][2] = state[3][2], state[3][1]
+        puzzle = NPuzzle(state, heuristic="m")
+        self.assertFalse(puzzle.solvable)
+        self.assertEqual(puzzle.solve(), -1)
+        with self.assertRaises(ValueError):
+            NPuzzle([[1, 2, 3], [4, 5, 6], [7, 8, 9]], heuristic="m")
+
     def test_get_neighbors(self):
         """
         Test that get_neighbors produces the correct number of neighbors for a 2x2 puzzle.
@@ -88,6 +336,18 @@ class TestNPuzzleSolver(unittest.TestCase):
         for pos in blank_positions:
             self.assertIn(pos, expected_positions)
 
+    def test_successors(self):
+        """
+        Test that successors swaps the blank with each adjacent tile of the flat encoding and 
+        reports the blank's new index.
+        """
+        puzzle = NPuzzle([[1, 2, 3], [4, 0, 6], [7, 8, 5]], heuristic="m")
+        children = puzzle.successors(puzzle.start, 4)
+        self.assertEqual(len(children), 4)
+        for child, blank, _ in children:
+            self.assertEqual(child[blank], 0)
+            self.assertEqual(child[4], puzzle.start[blank])
+
     def test_solve_already_solved(self):
         """
         Test that the solver returns 0 moves when the puzzle is already solved.
@@ -143,6 +403,576 @@ class TestNPuzzleSolver(unittest.TestCase):
         puzzle = NPuzzle(puzzle_list, heuristic="m")
         moves = puzzle.solve()
         self.assertEqual(moves, 1)
+    def test_solve_3x3(self):
+        """
+        Test that the solver finds the optimal cost for 3x3 puzzles of moderate and maximal depth.
+        """
+        self.assertEqual(NPuzzle([[8, 1, 3], [4, 0, 2], [7, 6, 5]], heuristic="m").solve(), 14)
+        self.assertEqual(NPuzzle([[8, 6, 7], [2, 5, 4], [3, 0, 1]], heuristic="m").solve(), 31)
+
+    def test_ida_matches_astar(self):
+        """
+        Test that IDA* mode, with and without a transposition table, returns the same optimal 
+        cost as A*.
+        """
+        state = [[8, 6, 7], [2, 5, 4], [3, 0, 1]]
+        puzzle = NPuzzle(state, heuristic="m", mode="ida")
+        self.assertEqual(puzzle.solve(), 31)
+        self.assertEqual(puzzle.solve(transposition_size=1000), 31)
+        self.assertEqual(NPuzzle(generate_goal_state(3), heuristic="m", mode="ida").solve(), 0)
+
+    def test_return_path(self):
+        """
+        Test that A* and IDA* return an optimal move sequence that replays to the goal, and that the 
+        cost-only call is unchanged.
+        """
+        state = [[8, 1, 3], [4, 0, 2], [7, 6, 5]]
+        for mode in ("astar", "ida"):
+            puzzle = NPuzzle(state, heuristic="m", mode=mode)
+            cost, path = puzzle.solve(return_path=True)
+            self.assertEqual(cost, 14)
+            self.assertEqual(len(path), 14)
+            self.assertEqual(puzzle.apply_path(path), puzzle.goal_state)
+            self.assertEqual(puzzle.solve(), 14)
+        goal = NPuzzle(generate_goal_state(3), heuristic="m")
+        self.assertEqual(goal.solve(return_path=True), (0, []))
+
+    def test_stats_and_progress(self):
+        """
+        Test that stats are appended to the result of A* and IDA*, that the counters are consistent 
+        and that the progress callback is invoked every progress_every expansions.
+        """
+        state = [[8, 6, 7], [2, 5, 4], [3, 0, 1]]
+        calls = []
+        cost, path, stats = NPuzzle(state, heuristic="m").solve(
+            return_path=True, stats=True, progress=lambda s: calls.append(s.nodes_expanded), progress_every=1000)
+        self.assertEqual((cost, len(path)), (31, 31))
+        self.assertIsInstance(stats, SearchStats)
+        self.assertEqual(calls, list(range(1000, stats.nodes_expanded + 1, 1000)))
+        self.assertGreaterEqual(stats.nodes_generated, stats.nodes_expanded)
+        self.assertGreater(stats.peak_open, 0)
+        self.assertGreater(stats.nodes_per_second, 0)
+        self.assertIn("heuristic_time", stats.to_dict())
+        cost, stats = NPuzzle(state, heuristic="m", mode="ida").solve(stats=True)
+        self.assertEqual(cost, 31)
+        self.assertGreater(stats.iterations, 1)
+        self.assertEqual(stats.peak_open, 30)
+
+    def test_bidirectional_matches_astar(self):
+        """
+        Test that bidirectional mode returns the optimal cost and a path that joins both halves 
+        correctly, for an incremental and a non-incremental forward heuristic.
+        """
+        for heuristic in ("m", "l"):
+            puzzle = NPuzzle([[8, 6, 7], [2, 5, 4], [3, 0, 1]], heuristic=heuristic, mode="bidirectional")
+            cost, path = puzzle.solve(return_path=True)
+            self.assertEqual(cost, 31)
+            self.assertEqual(len(path), 31)
+            self.assertEqual(puzzle.apply_path(path), puzzle.goal_state)
+        solved = NPuzzle(generate_goal_state(4), heuristic="m", mode="bidirectional")
+        self.assertEqual(solved.solve(return_path=True), (0, []))
+
+    def test_parallel_matches_astar(self):
+        """
+        Test that the multi-process mode returns the optimal cost and a valid path, and reports the 
+        work of every process.
+        """
+        puzzle = NPuzzle([[8, 6, 7], [2, 5, 4], [3, 0, 1]], heuristic="m", mode="parallel")
+        cost, path, stats = puzzle.solve(return_path=True, stats=True, use_table=False, processes=2)
+        self.assertEqual(cost, 31)
+        self.assertEqual(puzzle.apply_path(path), puzzle.goal_state)
+        self.assertTrue(1 <= len(stats.workers) <= 2)
+        self.assertGreater(sum(worker["tasks"] for worker in stats.workers), 0)
+        self.assertLessEqual(sum(worker["nodes_expanded"] for worker in stats.workers), stats.nodes_expanded)
+        # Unsolvable boards never reach the engine, and solved ones are found by the split itself
+        solved = NPuzzle(generate_goal_state(4), heuristic="m", mode="parallel")
+        self.assertEqual(solved.solve(return_path=True, processes=1), (0, []))
+        with self.assertRaises(BudgetExceeded):
+            puzzle.solve(use_table=False, processes=1, max_expansions=200)
+
+    def test_external_matches_astar(self):
+        """
+        Test that the external-memory mode returns the optimal cost and a valid path while spilling 
+        its buckets to disk, and removes its files afterwards.
+        """
+        state = [[5, 1, 7], [2, 6, 3], [0, 4, 8]]
+        directory = tempfile.mkdtemp()
+        for heuristic in ("m", "e"):
+            puzzle = NPuzzle(state, heuristic=heuristic, mode="external")
+            cost, path = puzzle.solve(return_path=True, use_table=False, directory=directory, memory_limit=50)
+            self.assertEqual(cost, 20)
+            self.assertEqual(puzzle.apply_path(path), puzzle.goal_state)
+        self.assertEqual(os.listdir(directory), [])
+        os.rmdir(directory)
+        with self.assertRaises(BudgetExceeded):
+            puzzle.solve(use_table=False, max_expansions=50)
+
+    @unittest.skipUnless(vectorized.available(), "NumPy is not installed")
+    def test_vectorized_matches_astar(self):
+        """
+        Test that the vectorized mode returns the optimal cost and a valid path for every heuristic.
+        """
+        state = [[5, 1, 7], [2, 6, 3], [0, 4, 8]]
+        for heuristic in HEURISTICS:
+            puzzle = NPuzzle(state, heuristic=heuristic, mode="vectorized")
+            cost, path = puzzle.solve(return_path=True, use_table=False)
+            self.assertEqual(cost, 20)
+            self.assertEqual(puzzle.apply_path(path), puzzle.goal_state)
+        puzzle = NPuzzle([[1, 2, 3, 4, 5], [6, 7, 8, 9, 10], [11, 12, 13, 14, 15], [16, 17, 18, 0, 19],
+                          [21, 22, 23, 24, 20]], heuristic="m", mode="vectorized")
+        self.assertEqual(puzzle.solve(), 2)
+        with self.assertRaises(BudgetExceeded):
+            NPuzzle(state, mode="vectorized").solve(use_table=False, max_expansions=10)
+
+    @unittest.skipUnless(vectorized.available(), "NumPy is not installed")
+    def test_vectorized_builders(self):
+        """
+        Test that the NumPy table builders match the pure Python breadth-first searches.
+        """
+        self.assertEqual(build_pdb(3, (1, 2, 3, 4), vectorize=True), build_pdb(3, (1, 2, 3, 4), vectorize=False))
+        self.assertEqual(build_pdb(4, (1, 2, 3), vectorize=True), build_pdb(4, (1, 2, 3), vectorize=False))
+        table = distance_table.build_table(vectorize=True)
+        for state in ([[1, 2, 3], [4, 5, 6], [7, 8, 0]], [[8, 6, 7], [2, 5, 4], [3, 0, 1]],
+                      [[5, 1, 7], [2, 6, 3], [0, 4, 8]]):
+            puzzle = NPuzzle(state, mode="ida")
+            self.assertEqual(table[rank(puzzle.start)], puzzle.solve(use_table=False))
+        self.assertEqual(table.count(distance_table.UNSEEN), 0)
+
+    def test_pack_preserves_order(self):
+        """
+        Test that packed records round-trip and sort like the states they encode.
+        """
+        states = sorted(bytes(perm) for perm in ([1, 2, 3, 4, 5, 6, 7, 8, 0], [0, 8, 7, 6, 5, 4, 3, 2, 1],
+                                                  [1, 2, 3, 4, 5, 6, 0, 7, 8], [1, 2, 3, 4, 5, 6, 7, 0, 8]))
+        self.assertEqual([unpack(pack(state, 3), 3) for state in states], states)
+        self.assertEqual(sorted(pack(state, 3) for state in states), [pack(state, 3) for state in states])
+        self.assertEqual(len(pack(bytes(range(16)), 4)), 8)
+        self.assertEqual(unpack(pack(bytes(range(25)), 5), 5), bytes(range(25)))
+
+    def test_budgets(self):
+        """
+        Test that optimal engines raise BudgetExceeded with the statistics collected so far, and that 
+        the anytime mode returns its best solution instead once it has one.
+        """
+        state = [[8, 6, 7], [2, 5, 4], [3, 0, 1]]
+        for mode in ("astar", "ida", "bidirectional"):
+            with self.assertRaises(BudgetExceeded) as raised:
+                NPuzzle(state, heuristic="m", mode=mode).solve(max_expansions=100, stats=True)
+            self.assertEqual(raised.exception.reason, "max_expansions")
+            self.assertEqual(raised.exception.stats.nodes_expanded, 100)
+        with self.assertRaises(BudgetExceeded):
+            NPuzzle(state, heuristic="m").solve(max_open=10, use_table=False)
+        puzzle = NPuzzle(state, heuristic="m", mode="anytime")
+        cost = puzzle.solve(max_expansions=1000, weight=3)
+        self.assertGreaterEqual(cost, 31)
+        self.assertLessEqual(puzzle.nodes_expanded, 1000)
+        self.assertGreaterEqual(puzzle.suboptimality * 31, cost)
+
+    def test_suboptimal_modes(self):
+        """
+        Test that weighted, greedy and anytime modes return valid solutions whose cost is within 
+        their reported suboptimality factor of the optimum.
+        """
+        state = [[8, 6, 7], [2, 5, 4], [3, 0, 1]]
+        for mode, options in (("weighted", {"weight": 1.5}), ("greedy", {}), ("anytime", {})):
+            puzzle = NPuzzle(state, heuristic="m", mode=mode)
+            cost, path = puzzle.solve(return_path=True, use_table=False, **options)
+            self.assertEqual(len(path), cost)
+            self.assertEqual(puzzle.apply_path(path), puzzle.goal_state)
+            self.assertGreaterEqual(cost, 31)
+            self.assertLessEqual(cost, 31 * puzzle.suboptimality + 1e-9)
+            if mode == "weighted":
+                self.assertLessEqual(puzzle.suboptimality, 1.5)
+            if mode == "anytime":
+                # Without a budget the anytime search runs until the solution is proven optimal
+                self.assertEqual((cost, puzzle.suboptimality), (31, 1.0))
+        with self.assertRaises(ValueError):
+            NPuzzle(state, heuristic="m", mode="weighted").solve(weight=0.5)
+
+    def test_unknown_mode(self):
+        """
+        Test that an unknown search mode is rejected by the constructor.
+        """
+        with self.assertRaises(ValueError):
+            NPuzzle([list(row) for row in generate_goal_state(3)], heuristic="m", mode="dfs")
+
+
+class TestBatch(unittest.TestCase):
+    def test_solve_many(self):
+        """
+        Test that solve_many reports the cost of every puzzle, in process and across a process pool, 
+        and reports invalid puzzles and sizes outside 3x3..6x6 as errors.
+        """
+        states = [
+            [[8, 1, 3], [4, 0, 2], [7, 6, 5]],
+            [[1, 2, 3], [4, 5, 6], [7, 0, 8]],
+            [[1, 2, 3], [4, 5, 6], [8, 7, 0]],
+            [[1, 1, 1], [2, 2, 2], [0, 0, 0]],
+            [[1, 2], [0, 3]],
+        ]
+        for workers in (1, 2):
+            results = sorted(solve_many(states, heuristic="m", workers=workers), key=lambda r: r["index"])
+            self.assertEqual([r.get("cost") for r in results], [14, 1, -1, None, None])
+            self.assertIn("error", results[3])
+            self.assertIn("Invalid puzzle size: 2x2", results[4]["error"])
+            self.assertGreater(results[0]["nodes_expanded"], 0)
+
+    def test_unparsable_input_stops_the_batch(self):
+        """
+        Test that input that cannot be parsed ends the batch with a message and exit status 1, after 
+        the puzzles read before it are solved.
+        """
+        directory = tempfile.mkdtemp()
+        puzzles = os.path.join(directory, "puzzles.jsonl")
+        with open(puzzles, "w") as file:
+            file.write("[[1, 2, 3], [4, 5, 6], [7, 0, 8]]\n[1, 2]\n[[8, 1, 3], [4, 0, 2], [7, 6, 5]]\n")
+        for workers in ("1", "2"):
+            output, errors = io.StringIO(), io.StringIO()
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(errors):
+                status = batch.main([puzzles, "--workers", workers])
+            self.assertEqual(status, 1)
+            self.assertEqual([json.loads(line)["cost"] for line in output.getvalue().splitlines()], [1])
+            self.assertTrue(errors.getvalue().startswith("Error: Line 2: "))
+
+    def test_missing_dependency_is_reported_per_puzzle(self):
+        """
+        Test that a mode whose optional dependency is missing yields an error record for each puzzle 
+        instead of aborting the batch, and that unknown modes are rejected by the command line.
+        """
+        states = [[[8, 1, 3], [4, 0, 2], [7, 6, 5]], [[1, 2, 3], [4, 5, 6], [7, 0, 8]]]
+        numpy = vectorized.np
+        vectorized.np = None
+        try:
+            results = sorted(solve_many(states, mode="vectorized", workers=1, use_table=False),
+                             key=lambda r: r["index"])
+        finally:
+            vectorized.np = numpy
+        self.assertEqual([r["index"] for r in results], [0, 1])
+        self.assertTrue(all("NumPy" in r["error"] for r in results))
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            batch.main(["--mode", "fast", os.devnull])
+
+    def test_cache_flag_keeps_the_puzzle_file(self):
+        """
+        Test that --cache takes no value, so the file after it is still read as the puzzle input, 
+        and that --cache-db selects the database.
+        """
+        directory = tempfile.mkdtemp()
+        puzzles = os.path.join(directory, "puzzles.txt")
+        database = os.path.join(directory, "solutions.sqlite")
+        with open(puzzles, "w") as file:
+            file.write("8 1 3\n4 0 2\n7 6 5\n")
+        for argv in (["--cache", puzzles], ["--cache-db", database, puzzles]):
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                batch.main(argv + ["--workers", "1"])
+            self.assertEqual(json.loads(output.getvalue())["cost"], 14)
+        self.assertTrue(os.path.exists(database))
+        with SolutionCache(database) as cache:
+            self.assertEqual(cache.get(NPuzzle([[8, 1, 3], [4, 0, 2], [7, 6, 5]]).start, 3)[0], 14)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_generate_instances(self):
+        """
+        Test that seeded random walks are reproducible and solvable within the walk length.
+        """
+        instances = generate_instances(sizes=(3, 4), depths={3: (8,), 4: (12,)}, count=2, seed=7)
+        self.assertEqual(instances, generate_instances(sizes=(3, 4), depths={3: (8,), 4: (12,)}, count=2, seed=7))
+        self.assertEqual([instance["name"] for instance in instances], ["3x3-d8-0", "3x3-d8-1", "4x4-d12-0", "4x4-d12-1"])
+        for instance in instances:
+            puzzle = NPuzzle(instance["state"], heuristic="m")
+            self.assertTrue(puzzle.solvable)
+            self.assertLessEqual(puzzle.solve(use_table=False), instance["depth"])
+
+    def test_from_korf(self):
+        """
+        Test that Korf's goal layout (blank first) converts to this solver's goal.
+        """
+        self.assertEqual(from_korf(list(range(16))), [list(row) for row in generate_goal_state(4)])
+
+    def test_compare_flags_regressions(self):
+        """
+        Test that compare reports slower runs and wrong costs, but not unchanged results.
+        """
+        instances = generate_instances(sizes=(3,), depths={3: (10,)}, count=1)
+        baseline = {"results": run_benchmark(instances, modes=["astar", "ida"], heuristics=["m"], memory=True)}
+        self.assertTrue(all(record["nodes_expanded"] > 0 and record["peak_memory"] > 0 for record in baseline["results"]))
+        self.assertEqual(compare(baseline, baseline), [])
+        current = {"results": [dict(record) for record in baseline["results"]]}
+        current["results"][0].update(time=1.0, cost=current["results"][0]["cost"] + 2)
+        metrics = [regression["metric"] for regression in compare(baseline, current)]
+        self.assertEqual(sorted(metrics), ["cost", "time"])
+
+    def test_compare_allows_better_suboptimal_costs(self):
+        """
+        Test that a cheaper result of a bounded-suboptimal mode is not a regression, but a costlier
+        one is.
+        """
+        instances = generate_instances(sizes=(3,), depths={3: (20,)}, count=1)
+        baseline = {"results": run_benchmark(instances, modes=["weighted"], heuristics=["m"], memory=False)}
+        self.assertGreater(baseline["results"][0]["suboptimality"], 1)
+        cheaper = {"results": [dict(baseline["results"][0], cost=baseline["results"][0]["cost"] - 2)]}
+        self.assertEqual(compare(baseline, cheaper), [])
+        costlier = {"results": [dict(baseline["results"][0], cost=baseline["results"][0]["cost"] + 2)]}
+        self.assertEqual([regression["metric"] for regression in compare(baseline, costlier)], ["cost"])
+
+    def test_bundled_korf_set(self):
+        """
+        Test that the bundled Korf 100 instances load with their optimal costs, and that compare 
+        flags an optimal result that disagrees with the known optimum.
+        """
+        instances = load_korf()
+        self.assertEqual([instance["name"] for instance in instances], [f"korf-{i}" for i in range(1, 101)])
+        # Korf's published average solution length
+        self.assertEqual(sum(instance["optimal"] for instance in instances), 5305)
+        for instance in instances:
+            puzzle = NPuzzle(instance["state"], heuristic="m")
+            self.assertTrue(puzzle.solvable)
+            bound = puzzle.heuristic(4, puzzle.start)
+            self.assertLessEqual(bound, instance["optimal"])
+            self.assertEqual((instance["optimal"] - bound) % 2, 0)
+        record = {"instance": "korf-1", "mode": "ida", "heuristic": "p", "optimal": 57, "suboptimality": 1.0}
+        self.assertEqual(compare({"results": []}, {"results": [dict(record, cost=57)]}), [])
+        regressions = compare({"results": []}, {"results": [dict(record, cost=55)]})
+        self.assertEqual([(r["metric"], r["baseline"], r["current"]) for r in regressions], [("optimal", 57, 55)])
+
+
+class TestSolutionCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "solutions.sqlite")
+
+    def test_transposed_board_hits_cache(self):
+        """
+        Test that a board and its reflection across the main diagonal share a cache entry, and that 
+        the cached path is mapped back so it solves the reflected board.
+        """
+        board = [[8, 1, 3], [4, 0, 2], [7, 6, 5]]
+        # Reflect positions across the diagonal and relabel each tile with its reflected goal tile
+        relabel = {0: 0, 1: 1, 2: 4, 3: 7, 4: 2, 5: 5, 6: 8, 7: 3, 8: 6}
+        reflected = [[relabel[board[j][i]] for j in range(3)] for i in range(3)]
+        puzzle, mirror = NPuzzle(board, heuristic="m"), NPuzzle(reflected, heuristic="m")
+        self.assertEqual(canonicalize(puzzle.start, 3)[0], canonicalize(mirror.start, 3)[0])
+        with SolutionCache(self.path) as cache:
+            self.assertEqual(puzzle.solve(return_path=True, cache=cache)[0], 14)
+            cost, path, stats = mirror.solve(return_path=True, stats=True, cache=cache)
+        self.assertEqual((cost, stats.nodes_expanded), (14, 0))
+        self.assertEqual(mirror.apply_path(path), mirror.goal_state)
+        # Entries persist across connections
+        with SolutionCache(self.path) as cache:
+            self.assertEqual(cache.get(puzzle.start, 3)[0], 14)
+            self.assertIsNone(cache.get(NPuzzle(generate_goal_state(3), heuristic="m").start, 3))
+
+    def test_cost_only_entry_does_not_answer_path_requests(self):
+        """
+        Test that an entry stored without a path is a miss when a path is requested, and is 
+        completed by the next solve.
+        """
+        puzzle = NPuzzle([[8, 1, 3], [4, 0, 2], [7, 6, 5]], heuristic="m")
+        with SolutionCache(self.path) as cache:
+            puzzle.solve(cache=cache)
+            self.assertEqual(cache.get(puzzle.start, 3), (14, None))
+            self.assertIsNone(cache.get(puzzle.start, 3, need_path=True))
+            puzzle.solve(return_path=True, cache=cache)
+            self.assertEqual(len(cache.get(puzzle.start, 3, need_path=True)[1]), 14)
+
+    def test_size_based_eviction(self):
+        """
+        Test that the least recently accessed entries are evicted once the database exceeds its size.
+        """
+        with SolutionCache(self.path, memory_size=4, max_bytes=16 * 1024) as cache:
+            states = [bytes([i % 256, i // 256]) + bytes(range(2, 16)) for i in range(2000)]
+            for state in states:
+                cache.put(state, 4, 1, ["Left"] * 40)
+            rows = cache.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+            self.assertLess(rows, len(states))
+            self.assertIsNotNone(cache.get(states[-1], 4))
+            self.assertIsNone(cache.get(states[0], 4))
+
+
+class TestDistanceTable(unittest.TestCase):
+    def setUp(self):
+        # Build the table in a directory of its own so other tests keep searching 3x3 boards
+        self.previous_data_dir = os.environ["NPUZZLE_DATA_DIR"]
+        self.directory = tempfile.TemporaryDirectory()
+        os.environ["NPUZZLE_DATA_DIR"] = self.directory.name
+
+    def tearDown(self):
+        os.environ["NPUZZLE_DATA_DIR"] = self.previous_data_dir
+        distance_table._tables.clear()
+        self.directory.cleanup()
+
+    def test_rank_is_a_perfect_hash(self):
+        """
+        Test that rank maps distinct solvable 3x3 states to distinct indices within the table.
+        """
+        puzzle = NPuzzle(generate_goal_state(3), heuristic="m")
+        seen = {rank(puzzle.start)}
+        layer = [(puzzle.start, puzzle.start.index(0))]
+        states = {puzzle.start}
+        for _ in range(12):
+            next_layer = []
+            for state, blank in layer:
+                for child, child_blank, _ in puzzle.successors(state, blank):
+                    if child not in states:
+                        states.add(child)
+                        seen.add(rank(child))
+                        next_layer.append((child, child_blank))
+            layer = next_layer
+        self.assertEqual(len(seen), len(states))
+        self.assertTrue(all(0 <= index < SIZE for index in seen))
+
+    def test_missing_data_dir_is_not_created(self):
+        """
+        Test that without a table, 3x3 puzzles are searched without creating the data directory, even 
+        where it cannot be created.
+        """
+        blocker = os.path.join(self.directory.name, "file")
+        open(blocker, "w").close()
+        # A directory below a regular file can never be created
+        os.environ["NPUZZLE_DATA_DIR"] = os.path.join(blocker, "data")
+        puzzle = NPuzzle([[8, 1, 3], [4, 0, 2], [7, 6, 5]], heuristic="m")
+        self.assertEqual(puzzle.solve(), 14)
+        self.assertGreater(puzzle.nodes_expanded, 0)
+        self.assertIsNone(load_table())
+        self.assertIn(os.path.join(blocker, "data", "8puzzle.bin"), distance_table._tables)
+
+    def test_solve_by_lookup(self):
+        """
+        Test that once the table is built, 3x3 puzzles are answered without search, with an optimal 
+        path found by greedy descent.
+        """
+        table = load_table(build=True)
+        self.assertEqual(max(table), 31)
+        puzzle = NPuzzle([[8, 6, 7], [2, 5, 4], [3, 0, 1]], heuristic="m")
+        cost, path, stats = puzzle.solve(return_path=True, stats=True)
+        self.assertEqual((cost, len(path), stats.nodes_expanded), (31, 31, 0))
+        self.assertEqual(puzzle.apply_path(path), puzzle.goal_state)
+        self.assertEqual(puzzle.solve(use_table=False), 31)
+        self.assertGreater(puzzle.nodes_expanded, 0)
+
+
+class TestHeuristics(unittest.TestCase):
+    def test_delta_matches_full_evaluation(self):
+        """
+        Test that the incremental Manhattan and Euclidean updates agree with a full rescan 
+        along a sequence of moves on a 4x4 board.
+        """
+        puzzle = NPuzzle([list(row) for row in generate_goal_state(4)], heuristic="m")
+        state, blank = puzzle.start, puzzle.start.index(0)
+        h_m, h_e = manhattan(4, state), euclidean(4, state)
+        for step in range(40):
+            children = puzzle.successors(state, blank)
+            child, child_blank, move = children[step % len(children)]
+            tile = state[child_blank]
+            h_m = manhattan_delta(4, h_m, tile, child_blank, move)
+            h_e = euclidean_delta(4, h_e, tile, child_blank, move)
+            state, blank = child, child_blank
+            self.assertEqual(h_m, manhattan(4, state))
+            self.assertAlmostEqual(h_e, euclidean(4, state))
+
+    def test_linear_conflict_and_walking_distance(self):
+        """
+        Test that linear conflict and walking distance are zero at the goal, dominate Manhattan and 
+        never overestimate the optimal cost found by A* along a sequence of moves.
+        """
+        puzzle = NPuzzle([list(row) for row in generate_goal_state(3)], heuristic="m")
+        state, blank = puzzle.start, puzzle.start.index(0)
+        for h in (linear_conflict, walking_distance):
+            self.assertEqual(h(3, state), 0)
+        for step in range(25):
+            children = puzzle.successors(state, blank)
+            state, blank, _ = children[(step * 7) % len(children)]
+            optimal = NPuzzle([list(state[i:i + 3]) for i in range(0, 9, 3)], heuristic="m").solve()
+            for h in (linear_conflict, walking_distance):
+                self.assertGreaterEqual(h(3, state), manhattan(3, state))
+                self.assertLessEqual(h(3, state), optimal)
+
+    def test_registry(self):
+        """
+        Test that every registered heuristic can be selected and solves a 3x3 puzzle optimally.
+        """
+        state = [[8, 1, 3], [4, 0, 2], [7, 6, 5]]
+        for code in HEURISTICS:
+            self.assertEqual(NPuzzle(state, heuristic=code).solve(), 14)
+        # Heuristics with a size limit reject larger boards up front, naming the heuristic
+        with self.assertRaisesRegex(UnsupportedHeuristic, "Walking Distance"):
+            NPuzzle([list(row) for row in generate_goal_state(5)], heuristic="w")
+
+
+class TestOpenList(unittest.TestCase):
+    def test_backends_pop_in_priority_order(self):
+        """
+        Test that both open-list backends pop entries by increasing priority.
+        """
+        for backend in (HeapOpenList, BucketOpenList):
+            frontier = backend()
+            for priority in (5, 2, 7, 2, 0):
+                frontier.push((priority, "x"))
+            popped = [frontier.pop()[0] for _ in range(len(frontier))]
+            self.assertEqual(popped, [0, 2, 2, 5, 7])
+            self.assertFalse(frontier)
+
+    def test_solve_with_bucket_open_list(self):
+        """
+        Test that the bucket open list yields the same optimal cost as the heap and rejects 
+        non-integer heuristics.
+        """
+        state = [[8, 6, 7], [2, 5, 4], [3, 0, 1]]
+        self.assertEqual(NPuzzle(state, heuristic="m").solve(open_list="bucket"), 31)
+        with self.assertRaises(ValueError):
+            NPuzzle(state, heuristic="e").solve(open_list="bucket")
+
+
+class TestPatternDatabase(unittest.TestCase):
+    def setUp(self):
+        """
+        Point the table directory at a temporary location for the duration of each test.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.previous = os.environ.get("NPUZZLE_DATA_DIR")
+        os.environ["NPUZZLE_DATA_DIR"] = self.directory
+        pattern_databases.cache_clear()
+
+    def tearDown(self):
+        if self.previous is None:
+            del os.environ["NPUZZLE_DATA_DIR"]
+        else:
+            os.environ["NPUZZLE_DATA_DIR"] = self.previous
+        pattern_databases.cache_clear()
+
+    def test_save_and_load_roundtrip(self):
+        """
+        Test that a pattern database written to disk is memory-mapped back unchanged.
+        """
+        tiles = (1, 2, 3, 4)
+        table = build_pdb(3, tiles)
+        path = pdb_path(3, tiles, self.directory)
+        save_pdb(path, 3, tiles, table)
+        self.assertEqual(bytes(load_pdb(path, 3, tiles)), bytes(table))
+        with self.assertRaises(ValueError):
+            load_pdb(path, 3, (5, 6, 7, 8))
+
+    def test_dominates_manhattan(self):
+        """
+        Test that the pattern database heuristic is zero at the goal and never weaker than Manhattan.
+        """
+        puzzle = NPuzzle([[8, 6, 7], [2, 5, 4], [3, 0, 1]], heuristic="p")
+        self.assertEqual(pattern_database(3, puzzle.goal), 0)
+        state, blank = puzzle.start, puzzle.start.index(0)
+        for step in range(30):
+            children = puzzle.successors(state, blank)
+            state, blank, _ = children[step % len(children)]
+            self.assertGreaterEqual(pattern_database(3, state), manhattan(3, state))
+
+    def test_solve_with_pattern_database(self):
+        """
+        Test that A* and IDA* with the pattern database heuristic find the optimal cost.
+        """
+        state = [[8, 6, 7], [2, 5, 4], [3, 0, 1]]
+        self.assertEqual(NPuzzle(state, heuristic="p").solve(), 31)
+        self.assertEqual(NPuzzle(state, heuristic="p", mode="ida").solve(), 31)
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,18 +1,18 @@
-from typing import List, Tuple
+import json
+import os
+from typing import IO, Iterator, List, Sequence, Tuple
 
-from typing import List
+# Possible blank moves: (row offset, column offset, move description)
+MOVES = [(0, 1, 'Right'), (0, -1, 'Left'), (1, 0, 'Down'), (-1, 0, 'Up')]
 
 def read_puzzle(file_path: str) -> List[List[int]]:
     """
     Reads a sliding puzzle configuration from a text file and returns it as a 2D list.
     
-    Each line in the file is assumed to represent a row of the puzzle. Tokens in each line 
-    are separated by whitespace. Tokens that are digits are converted to integers; any non-digit 
-    token is interpreted as 0 (representing the blank tile).
-    
-    After reading, each row is padded with zeros on the left if it has fewer elements than the 
-    number of rows, ensuring the puzzle is an n x n matrix. If a row has more than n elements, 
-    a ValueError is raised. Additionally, the function ensures that 3 <= n <= 6.
+    The file is parsed by iter_puzzles and its first puzzle is returned. In plain text, each line 
+    represents a row of the puzzle and tokens are separated by whitespace. The blank tile is either 
+    a non-digit token or an empty cell of a fixed-width layout, located by column alignment (see 
+    parse_rows). The function ensures that 3 <= n <= 6.
     
     Parameters:
         file_path (str): The path to the puzzle file.
@@ -21,36 +21,142 @@ def read_puzzle(file_path: str) -> List[List[int]]:
         List[List[int]]: A 2D list representing the puzzle state.
     
     Raises:
-        ValueError: If the puzzle size is not within the allowed range (3 <= n <= 6) or 
-                    if any row does not have the expected number of elements after padding.
+        ValueError: If the file holds no puzzle, if the puzzle size is not within the allowed range 
+                    (3 <= n <= 6), if any row does not have the expected number of elements, or 
+                    if the tiles are not a permutation of 0..n*n - 1.
     """
-    puzzle: List[List[int]] = []
-
-    # Open and read the file line by line
     with open(file_path) as file:
-        for line in file:
-            # Remove trailing newline characters and split the line into tokens
-            tokens = line.rstrip("\n").split()
-            # Convert each token to an integer if it's a digit; otherwise, use 0
-            row = [int(token) if token.isdigit() else 0 for token in tokens]
-            puzzle.append(row)
+        puzzle = next(iter_puzzles(file), None)
+    if puzzle is None:
+        raise ValueError(f"No puzzle found in {file_path}.")
 
+    check_puzzle_size(puzzle)
+    validate_puzzle(puzzle)
+    return puzzle
+
+def check_puzzle_size(puzzle: Sequence[Sequence[int]]) -> None:
+    """
+    Checks that a puzzle read from input has a supported size, 3 <= n <= 6.
+    
+    Shared by read_puzzle and the command line, so every input path accepts the same boards.
+    
+    Parameters:
+        puzzle (Sequence[Sequence[int]]): The puzzle rows.
+    
+    Raises:
+        ValueError: If the number of rows is not between 3 and 6.
+    """
     n = len(puzzle)  # The expected number of elements per row based on the number of rows
 
     # Enforce the constraint 3 <= n <= 6
     if not (3 <= n <= 6):
         raise ValueError(f"Invalid puzzle size: {n}x{n}. Puzzle size must be between 3 and 6.")
 
-    # Pad rows with fewer elements than n by inserting zeros at the beginning
-    for idx, row in enumerate(puzzle):
-        while len(row) < n:
-            row.insert(0, 0)
-        if len(row) != n:
-            raise ValueError(f"Row {idx+1} has {len(row)} elements but expected {n}.")
 
+def parse_rows(lines: Sequence[str]) -> List[List[int]]:
+    """
+    Parses the plain-text lines of one puzzle into rows of tiles.
+    
+    Tokens are separated by whitespace; a non-digit token is read as the blank. In fixed-width 
+    layouts the blank may also be an empty cell, which leaves its row one token short. The missing 
+    column is then found by alignment: every token of the short row is matched with the column 
+    whose extent, measured on the complete rows, it overlaps the most.
+    
+    Parameters:
+        lines (Sequence[str]): The lines of the puzzle, one per row.
+    
+    Returns:
+        List[List[int]]: A 2D list with n elements per row, n being the number of lines.
+    
+    Raises:
+        ValueError: If a row has more than n elements, or if an empty cell cannot be located.
+    """
+    n = len(lines)
+    rows: List[List[Tuple[int, int, int]]] = []
+    for line in lines:
+        # Tokens with their character extent, tabs expanded so columns stay aligned
+        line = line.rstrip("\n").expandtabs()
+        tokens = []
+        end = 0
+        for token in line.split():
+            start = line.index(token, end)
+            end = start + len(token)
+            tokens.append((start, end, int(token) if token.isdigit() else 0))
+        rows.append(tokens)
+
+    # Extent of every column over the rows that have all their cells
+    complete = [tokens for tokens in rows if len(tokens) == n]
+    columns = [(min(tokens[c][0] for tokens in complete), max(tokens[c][1] for tokens in complete))
+               for c in range(n)] if complete else []
+
+    puzzle: List[List[int]] = []
+    for idx, tokens in enumerate(rows):
+        if len(tokens) == n:
+            puzzle.append([value for _, _, value in tokens])
+            continue
+        if len(tokens) > n or not columns:
+            raise ValueError(f"Row {idx+1} has {len(tokens)} elements but expected {n}.")
+        row = [None] * n
+        for start, end, value in tokens:
+            # Lowest score = largest overlap with the column (or smallest gap to it)
+            column = min(range(n), key=lambda c: max(start, columns[c][0]) - min(end, columns[c][1]))
+            if row[column] is not None:
+                raise ValueError(f"Row {idx+1} has {len(tokens)} elements but expected {n}.")
+            row[column] = value
+        puzzle.append([0 if value is None else value for value in row])
     return puzzle
 
 
+def iter_puzzles(stream: IO[str]) -> Iterator[List[List[int]]]:
+    """
+    Lazily reads many puzzles from a text stream, one at a time.
+    
+    Two formats are accepted and may be mixed:
+      - JSON lines: a line starting with "[" or "{" holds one puzzle, either as a list of rows or 
+        as an object whose "state" key holds the list of rows.
+      - Plain text: consecutive lines of whitespace-separated tiles form one puzzle, and puzzles are 
+        separated by blank lines. Non-digit tokens and empty fixed-width cells are read as the 
+        blank (see parse_rows).
+    
+    Only the puzzle being parsed is held in memory, so arbitrarily large files or stdin can be streamed.
+    
+    Parameters:
+        stream (IO[str]): The text stream to read, e.g. an open file or sys.stdin.
+    
+    Yields:
+        List[List[int]]: Each puzzle as a 2D list, in the order of the stream.
+    
+    Raises:
+        ValueError: If a plain-text puzzle has a row that cannot be parsed (see parse_rows), or a 
+                    JSON line is not valid JSON or does not hold a list of rows.
+    """
+    lines: List[str] = []
+    for number, line in enumerate(stream, 1):
+        stripped = line.strip()
+        if stripped.startswith(("[", "{")):
+            # A JSON line ends any plain-text puzzle in progress
+            if lines:
+                yield parse_rows(lines)
+                lines = []
+            try:
+                record = json.loads(stripped)
+            except ValueError as error:
+                raise ValueError(f"Line {number}: invalid JSON: {error}") from None
+            state = record.get("state") if isinstance(record, dict) else record
+            if not isinstance(state, list) or not all(isinstance(row, list) for row in state):
+                raise ValueError(f"Line {number}: expected a list of rows or an object with a "
+                                 f"\"state\" list of rows")
+            yield [list(row) for row in state]
+        elif stripped:
+            lines.append(line)
+        elif lines:
+            # A blank line ends the current plain-text puzzle
+            yield parse_rows(lines)
+            lines = []
+    if lines:
+        yield parse_rows(lines)
+
+
 def generate_goal_state(n: int) -> Tuple[Tuple[int, ...], ...]:
     """
     Generates the goal state for an n x n sliding puzzle.
@@ -89,4 +195,126 @@ def find_blank(state: List[List[int]], n: int) -> Tuple[int, int]:
         for j in range(n):
             if state[i][j] == 0:
                 return i, j  # Return the coordinates of the blank tile
-    return -1, -1  # Return (-1, -1) if no blank tile is found
\ No newline at end of file
+    return -1, -1  # Return (-1, -1) if no blank tile is found
+
+def encode_state(state: Sequence[Sequence[int]]) -> bytes:
+    """
+    Encodes a puzzle state as a flat, row-major byte string.
+    
+    The solver works on this compact form internally: it is immutable and hashable like a 
+    tuple-of-tuples, but a successor is produced by a single swap and the encoding costs 
+    one byte per tile in the visited set. Tiles must be in the range 0..255, which covers 
+    every board up to 16 x 16.
+    
+    Parameters:
+        state (Sequence[Sequence[int]]): The puzzle state as a 2D list or tuple-of-tuples.
+    
+    Returns:
+        bytes: The flat encoding of the state, with tile i*n + j at index i*n + j.
+    """
+    return bytes(val for row in state for val in row)
+
+def decode_state(encoded: Sequence[int], n: int) -> Tuple[Tuple[int, ...], ...]:
+    """
+    Converts a flat encoding produced by encode_state back into a tuple-of-tuples.
+    
+    Parameters:
+        encoded (Sequence[int]): The flat, row-major puzzle state.
+        n (int): The dimension of the puzzle (n x n).
+    
+    Returns:
+        Tuple[Tuple[int, ...], ...]: The puzzle state as an immutable tuple-of-tuples.
+    """
+    return tuple(tuple(encoded[i * n:(i + 1) * n]) for i in range(n))
+
+def data_dir(create: bool = True) -> str:
+    """
+    Returns the directory holding precomputed tables, creating it if needed.
+    
+    The location is taken from the NPUZZLE_DATA_DIR environment variable and defaults to a 
+    "data" directory next to this module, so every solver process on a machine shares the same files.
+    
+    Parameters:
+        create (bool, optional): Create the directory if it does not exist. Pass False when only 
+                                 looking for files that may be missing, e.g. on a read-only install.
+    
+    Returns:
+        str: The path of the data directory.
+    """
+    path = os.environ.get("NPUZZLE_DATA_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
+
+def validate_puzzle(state: Sequence[Sequence[int]]) -> None:
+    """
+    Checks that the tiles of an n x n puzzle state are a permutation of 0..n*n - 1.
+    
+    Parameters:
+        state (Sequence[Sequence[int]]): The puzzle state as a 2D list or tuple-of-tuples.
+    
+    Raises:
+        ValueError: If a tile is missing, repeated or out of range.
+    """
+    n = len(state)
+    tiles = sorted(val for row in state for val in row)
+    if tiles != list(range(n * n)):
+        missing = sorted(set(range(n * n)) - set(tiles))
+        raise ValueError(f"Tiles must be a permutation of 0..{n * n - 1}; missing {missing}.")
+
+def count_inversions(sequence: Sequence[int]) -> int:
+    """
+    Counts the pairs i < j with sequence[i] > sequence[j] by merge sort in O(m log m).
+    
+    Parameters:
+        sequence (Sequence[int]): The values to examine.
+    
+    Returns:
+        int: The number of inversions.
+    """
+    values = list(sequence)
+    inversions = 0
+    width = 1
+    # Bottom-up merge sort, counting the elements each right-hand value jumps over
+    while width < len(values):
+        merged = []
+        for start in range(0, len(values), 2 * width):
+            left = values[start:start + width]
+            right = values[start + width:start + 2 * width]
+            i = j = 0
+            while i < len(left) and j < len(right):
+                if left[i] <= right[j]:
+                    merged.append(left[i])
+                    i += 1
+                else:
+                    merged.append(right[j])
+                    inversions += len(left) - i
+                    j += 1
+            merged.extend(left[i:])
+            merged.extend(right[j:])
+        values = merged
+        width *= 2
+    return inversions
+
+def is_solvable(state: Sequence[Sequence[int]]) -> bool:
+    """
+    Determines whether a puzzle state can reach the goal of generate_goal_state.
+    
+    A move never changes the parity of the number of inversions among the tiles (ignoring the blank) 
+    for odd n; for even n every vertical move flips it and moves the blank by one row. Hence a state 
+    is solvable if the inversion count is even for odd n, and if the inversion count plus the blank's 
+    row counted from the bottom (starting at 1) is odd for even n.
+    
+    Parameters:
+        state (Sequence[Sequence[int]]): The puzzle state as a 2D list or tuple-of-tuples, whose tiles 
+                                         must form a permutation (see validate_puzzle).
+    
+    Returns:
+        bool: True if the goal state is reachable, False otherwise.
+    """
+    n = len(state)
+    inversions = count_inversions([val for row in state for val in row if val != 0])
+    if n % 2 == 1:
+        return inversions % 2 == 0
+    blank_row_from_bottom = n - find_blank(state, n)[0]
+    return (inversions + blank_row_from_bottom) % 2 == 1
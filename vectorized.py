@@ -0,0 +1,389 @@
+import time
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: without it the pure Python engines and builders are used
+    np = None
+
+from budget import BudgetExceeded
+from heuristics import DELTA_TABLES, euclidean, euclidean_table, manhattan, manhattan_table
+from pattern_db import UNSEEN, pattern_database, pattern_databases
+from utils import MOVES, encode_state, generate_goal_state
+
+# Tolerance when comparing real-valued f values of one layer
+EPSILON = 1e-9
+
+def available():
+    """
+    Return whether NumPy is installed, so the vectorized engine and table builders can be used.
+
+    Returns:
+        bool: True if numpy could be imported.
+    """
+    return np is not None
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The vectorized engine and table builders require NumPy (pip install numpy).")
+
+def move_targets(n):
+    """
+    Tabulate where the blank goes for every blank index and move.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+
+    Returns:
+        numpy.ndarray: targets[blank, move] is the index the blank moves to with MOVES[move], or -1
+                       if the move leaves the board.
+    """
+    _require_numpy()
+    targets = np.full((n * n, len(MOVES)), -1, dtype=np.int64)
+    for blank in range(n * n):
+        i, j = divmod(blank, n)
+        for move, (di, dj, _) in enumerate(MOVES):
+            if 0 <= i + di < n and 0 <= j + dj < n:
+                targets[blank, move] = (i + di) * n + j + dj
+    return targets
+
+def expand(states, blanks, targets):
+    """
+    Generate the successors of a batch of states with one vectorized blank swap per move.
+
+    Parameters:
+        states (numpy.ndarray): The states, one flat encoding per row (states x n*n, uint8).
+        blanks (numpy.ndarray): The blank index of every state.
+        targets (numpy.ndarray): The table returned by move_targets.
+
+    Returns:
+        tuple: (children, child_blanks, parents, moves, tiles): the successor states, their blank
+               indices, the row of their parent in states, the index in MOVES of the move that
+               produced them and the tile that slid into the parent's blank cell.
+    """
+    children, child_blanks, parents, moves, tiles = [], [], [], [], []
+    for move in range(len(MOVES)):
+        target = targets[blanks, move]
+        rows = np.flatnonzero(target >= 0)
+        target = target[rows]
+        child = states[rows]  # Fancy indexing copies the parents
+        slid = child[np.arange(len(rows)), target]
+        child[np.arange(len(rows)), blanks[rows]] = slid
+        child[np.arange(len(rows)), target] = 0
+        children.append(child)
+        child_blanks.append(target)
+        parents.append(rows)
+        moves.append(np.full(len(rows), move, dtype=np.int8))
+        tiles.append(slid)
+    return (np.concatenate(children), np.concatenate(child_blanks), np.concatenate(parents),
+            np.concatenate(moves), np.concatenate(tiles))
+
+def pack_keys(states):
+    """
+    Pack every state of a batch into a key that sorts like the state, for sorting and np.unique.
+
+    Parameters:
+        states (numpy.ndarray): The states, one flat encoding per row (states x n*n, uint8).
+
+    Returns:
+        numpy.ndarray: One uint64 per state (four bits per tile) up to 4x4 boards; above, a
+                       fixed-size void view of each row, compared byte by byte.
+    """
+    cells = states.shape[1]
+    if cells <= 16:
+        shifts = np.arange(60, 60 - 4 * cells, -4, dtype=np.uint64)
+        return (states.astype(np.uint64) << shifts).sum(axis=1, dtype=np.uint64)
+    return np.ascontiguousarray(states).view(np.dtype((np.void, cells))).ravel()
+
+def batch_heuristic(n, heuristic, states):
+    """
+    Evaluate a heuristic on a whole batch of states.
+
+    Manhattan and Euclidean distances are gathered from their per-tile distance matrices and the
+    pattern database heuristic from its tables, with one array operation per tile or tile group.
+    Other heuristics are evaluated state by state.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+        heuristic (function): The heuristic function, e.g. heuristics.manhattan.
+        states (numpy.ndarray): The states, one flat encoding per row (states x n*n, uint8).
+
+    Returns:
+        numpy.ndarray: The heuristic value of every state (int64, or float64 for Euclidean).
+    """
+    _require_numpy()
+    if heuristic is manhattan or heuristic is euclidean:
+        table = manhattan_table(n) if heuristic is manhattan else euclidean_table(n)
+        distances = np.array(table, dtype=np.int64 if heuristic is manhattan else np.float64)
+        return distances[states, np.arange(n * n)].sum(axis=1)
+    if heuristic is pattern_database:
+        # positions[s, tile] is the cell of tile in state s
+        positions = np.argsort(states, axis=1).astype(np.int64)
+        total = np.zeros(len(states), dtype=np.int64)
+        for tiles, weights, table in pattern_databases(n):
+            index = positions[:, list(tiles)] @ np.array(weights, dtype=np.int64)
+            total += np.frombuffer(table, dtype=np.uint8)[index]
+        return total
+    values = [heuristic(n, state.tobytes()) for state in states]
+    return np.array(values, dtype=np.float64 if any(isinstance(value, float) for value in values) else np.int64)
+
+class _SortedParents:
+    """
+    Read-only mapping from a flat encoded state to the move that reached it, backed by sorted keys.
+
+    Lets NPuzzle.reconstruct_path walk the closed list of layered_astar without building a dict.
+    """
+
+    def __init__(self, n, keys, moves):
+        self.n = n
+        self.keys = keys
+        self.moves = moves
+
+    def __getitem__(self, state):
+        key = pack_keys(np.frombuffer(state, dtype=np.uint8).reshape(1, self.n * self.n))
+        return int(self.moves[np.searchsorted(self.keys, key)[0]])
+
+def layered_astar(puzzle, return_path=False, stats=None, progress=None, progress_every=10000, budget=None):
+    """
+    Solve a sliding puzzle with A* expanding whole f-layers at once on NumPy arrays.
+
+    The open list is a set of parallel arrays (states as a states x n*n uint8 array, g, h, blank
+    and the move that reached each state). Every step takes all open states of the smallest f as
+    one batch, generates their successors with vectorized blank swaps (see expand), and updates h
+    with the heuristic's delta table, or evaluates it on the whole batch (see batch_heuristic).
+    Successors already closed are dropped with a binary search in the sorted closed keys,
+    duplicates among the successors are merged with np.unique on the packed keys, and the rest
+    are merged into the open list, kept sorted by key, keeping the smallest g of every state.
+    With a consistent heuristic, states reached at the smallest f are reached at their optimal g,
+    so the first batch holding the goal gives the optimal cost.
+
+    Each layer of equal f is expanded in a few large batches, so the per-node cost of the Python
+    interpreter is paid once per batch rather than once per state.
+
+    Parameters:
+        puzzle (NPuzzle): The puzzle to solve.
+        return_path (bool, optional): Also return the moves of the solution.
+        stats (SearchStats, optional): Statistics to fill in; iterations counts the batches.
+        progress (function, optional): Called with stats after a batch, at most once per
+                                       progress_every expansions.
+        progress_every (int, optional): Number of expansions between progress calls.
+        budget (Budget, optional): Limits on the search, checked before every batch.
+
+    Returns:
+        int or tuple: The optimal cost, or (cost, path) with return_path, as returned by
+                      NPuzzle.solve; -1 if the puzzle is unsolvable.
+
+    Raises:
+        ImportError: If NumPy is not installed.
+        BudgetExceeded: If the budget runs out before the goal is reached.
+    """
+    _require_numpy()
+    n = puzzle.n
+    heuristic = puzzle.heuristic
+    targets = move_targets(n)
+    delta = None
+    if heuristic is manhattan or heuristic is euclidean:
+        delta = np.array(DELTA_TABLES[heuristic](n), dtype=np.int64 if heuristic is manhattan else np.float64)
+    goal_key = pack_keys(np.frombuffer(puzzle.goal, dtype=np.uint8).reshape(1, n * n))[0]
+
+    # The open list, one entry per array
+    states = np.frombuffer(puzzle.start, dtype=np.uint8).reshape(1, n * n).copy()
+    keys = pack_keys(states)
+    g = np.zeros(1, dtype=np.int64)
+    h = batch_heuristic(n, heuristic, states)
+    blanks = np.array([puzzle.start.index(0)], dtype=np.int64)
+    moves = np.full(1, -1, dtype=np.int8)
+    # The closed list: sorted keys and the move that reached each state
+    closed_keys = keys[:0]
+    closed_moves = moves[:0]
+    expanded = 0
+    last_progress = 0
+    clock = time.perf_counter
+
+    try:
+        while len(states):
+            if budget is not None:
+                reason = budget.exceeded(expanded, len(states))
+                if reason is not None:
+                    puzzle.nodes_expanded = expanded
+                    raise BudgetExceeded(reason, expanded)
+            f = g + h
+            batch = f <= f.min() + EPSILON
+            if stats is not None:
+                stats.iterations += 1
+
+            # Close the batch, keeping the closed keys sorted; both parts are sorted already, which the
+            # stable sort exploits
+            closed_keys = np.concatenate([closed_keys, keys[batch]])
+            order = np.argsort(closed_keys, kind="stable")
+            closed_keys = closed_keys[order]
+            closed_moves = np.concatenate([closed_moves, moves[batch]])[order]
+            found = np.flatnonzero(keys[batch] == goal_key)
+            if len(found):
+                cost = int(g[batch][found[0]])
+                puzzle.nodes_expanded = expanded
+                if not return_path:
+                    return cost
+                return cost, puzzle.reconstruct_path(_SortedParents(n, closed_keys, closed_moves), puzzle.goal)
+
+            parent_states, parent_blanks, parent_g, parent_h = states[batch], blanks[batch], g[batch], h[batch]
+            rest = ~batch
+            states, keys, g, h, blanks, moves = states[rest], keys[rest], g[rest], h[rest], blanks[rest], moves[rest]
+            expanded += len(parent_states)
+
+            started = clock()
+            children, child_blanks, parents, child_moves, tiles = expand(parent_states, parent_blanks, targets)
+            child_keys = pack_keys(children)
+            if stats is not None:
+                stats.successor_time += clock() - started
+                stats.nodes_generated += len(children)
+                started = clock()
+            # Drop successors that are already closed
+            where = np.minimum(np.searchsorted(closed_keys, child_keys), len(closed_keys) - 1)
+            fresh = closed_keys[where] != child_keys
+            children, child_blanks, parents = children[fresh], child_blanks[fresh], parents[fresh]
+            child_moves, tiles, child_keys = child_moves[fresh], tiles[fresh], child_keys[fresh]
+            if delta is not None:
+                child_h = parent_h[parents] + delta[tiles, child_blanks, child_moves]
+            else:
+                child_h = batch_heuristic(n, heuristic, children)
+            if stats is not None:
+                stats.heuristic_time += clock() - started
+                stats.duplicates_skipped += int(len(fresh) - fresh.sum())
+
+            # Keep one successor per state, the one with the smallest g
+            child_g = parent_g[parents] + 1
+            order = np.lexsort((child_g, child_keys))
+            _, first = np.unique(child_keys[order], return_index=True)
+            keep = order[first]
+            if stats is not None:
+                stats.duplicates_skipped += len(child_keys) - len(keep)
+            children, child_keys, child_g, child_h = children[keep], child_keys[keep], child_g[keep], child_h[keep]
+            child_blanks, child_moves = child_blanks[keep], child_moves[keep]
+
+            # Merge them into the open list, which stays sorted by key: a state already open keeps
+            # the smaller g, new states are inserted in place
+            where = np.searchsorted(keys, child_keys)
+            known = where < len(keys)
+            known[known] = keys[where[known]] == child_keys[known]
+            better = np.flatnonzero(known)[child_g[known] < g[where[known]]]
+            target = where[better]
+            g[target], h[target], moves[target] = child_g[better], child_h[better], child_moves[better]
+            if stats is not None:
+                stats.duplicates_skipped += int(known.sum())
+            new = ~known
+            where = where[new]
+            states = np.insert(states, where, children[new], axis=0)
+            keys = np.insert(keys, where, child_keys[new])
+            g = np.insert(g, where, child_g[new])
+            h = np.insert(h, where, child_h[new])
+            blanks = np.insert(blanks, where, child_blanks[new])
+            moves = np.insert(moves, where, child_moves[new])
+
+            if stats is not None:
+                stats.peak_open = max(stats.peak_open, len(states))
+                stats.peak_closed = len(closed_keys)
+                if progress is not None and expanded - last_progress >= progress_every:
+                    last_progress = expanded
+                    stats.nodes_expanded = expanded
+                    progress(stats)
+        puzzle.nodes_expanded = expanded
+        return (-1, None) if return_path else -1
+    finally:
+        if stats is not None:
+            stats.peak_closed = len(closed_keys)
+
+def _ranks(states):
+    """
+    Vectorized distance_table.rank of a batch of solvable 3x3 states.
+
+    Parameters:
+        states (numpy.ndarray): The states, one flat encoding per row (states x 9, uint8).
+
+    Returns:
+        numpy.ndarray: The index of every state in the distance table.
+    """
+    from distance_table import FACTORIALS
+    blanks = np.argmin(states, axis=1)
+    tiles = states[states != 0].reshape(len(states), 8).astype(np.int64)
+    # smaller[s, i] counts the later tiles of state s smaller than tile i
+    later = np.triu(np.ones((8, 8), dtype=bool), k=1)
+    smaller = ((tiles[:, None, :] < tiles[:, :, None]) & later).sum(axis=2)
+    index = smaller @ np.array(FACTORIALS[7::-1], dtype=np.int64)
+    return blanks * (FACTORIALS[8] // 2) + index // 2
+
+def build_table():
+    """
+    Vectorized distance_table.build_table: breadth-first search from the goal, one layer per array.
+
+    Returns:
+        bytearray: table[rank(state)] is the optimal number of moves from state to the goal.
+
+    Raises:
+        ImportError: If NumPy is not installed.
+    """
+    _require_numpy()
+    from distance_table import SIZE, UNSEEN as TABLE_UNSEEN
+    targets = move_targets(3)
+    table = np.full(SIZE, TABLE_UNSEEN, dtype=np.uint8)
+    layer = np.frombuffer(encode_state(generate_goal_state(3)), dtype=np.uint8).reshape(1, 9).copy()
+    table[_ranks(layer)] = 0
+    depth = 0
+    while len(layer):
+        depth += 1
+        children = expand(layer, np.argmin(layer, axis=1), targets)[0]
+        ranks = _ranks(children)
+        ranks, first = np.unique(ranks, return_index=True)
+        new = table[ranks] == TABLE_UNSEEN
+        table[ranks[new]] = depth
+        layer = children[first[new]]
+    return bytearray(table.tobytes())
+
+def build_pdb(n, tiles):
+    """
+    Vectorized pattern_db.build_pdb: the same backward breadth-first search over abstract states,
+    decoding and moving every state of a layer at once.
+
+    Parameters:
+        n (int): The dimension of the puzzle (n x n).
+        tiles (tuple of int): The tiles of the pattern.
+
+    Returns:
+        bytearray: The distance of every abstract state, UNSEEN for unreachable indices.
+
+    Raises:
+        ImportError: If NumPy is not installed.
+        ValueError: If a distance does not fit in a byte.
+    """
+    _require_numpy()
+    size = n * n
+    k = len(tiles)
+    weights = np.array([size ** (k - 1 - i) for i in range(k)], dtype=np.int64)
+    table = np.full(size ** k, UNSEEN, dtype=np.uint8)
+    start = int(np.dot(np.array(tiles, dtype=np.int64) - 1, weights))
+    table[start] = 0
+
+    layer = np.array([start], dtype=np.int64)
+    depth = 0
+    while len(layer):
+        depth += 1
+        if depth >= UNSEEN:
+            raise ValueError(f"Pattern {tiles} is too deep to be stored one byte per state.")
+        # positions[s, i] is the cell of the i-th pattern tile in abstract state s
+        positions = (layer[:, None] // weights) % size
+        rows, cols = np.divmod(positions, n)
+        # Bit p of occupied[s] is set when a pattern tile of abstract state s is on cell p
+        occupied = np.bitwise_or.reduce(np.left_shift(1, positions), axis=1)
+        children = []
+        for i in range(k):
+            for di, dj in ((0, 1), (0, -1), (1, 0), (-1, 0)):
+                target_rows, target_cols = rows[:, i] + di, cols[:, i] + dj
+                target = target_rows * n + target_cols
+                valid = (target_rows >= 0) & (target_rows < n) & (target_cols >= 0) & (target_cols < n)
+                # A pattern tile cannot slide onto another pattern tile
+                valid &= ((occupied >> np.where(valid, target, 0)) & 1) == 0
+                children.append(layer[valid] + (target[valid] - positions[valid, i]) * weights[i])
+        children = np.concatenate(children)
+        table[children[table[children] == UNSEEN]] = depth
+        # Reading the new layer back from the table is cheaper than sorting out the duplicates
+        layer = np.flatnonzero(table == depth)
+    return bytearray(table.tobytes())